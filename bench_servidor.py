@@ -0,0 +1,172 @@
+# bench_servidor.py
+# Compara los modelos de worker de gunicorn (sync, gthread y ASGI/uvicorn)
+# sobre las vistas reales, con la misma configuración de gunicorn.conf.py.
+#
+# Usa la base de DATABASE_URL (o db.sqlite3): conviene apuntarla a una copia
+# con datos reales (python manage.py restaurar ...). Solo hace GETs.
+#
+#   python bench_servidor.py
+#   python bench_servidor.py --modelos sync,gthread --requests 2000 --concurrencia 32
+#   python bench_servidor.py --workers 2          # mismo número de workers para todos
+import argparse
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RUTAS = [
+    "/ventas/",
+    "/ventas/mesas/",
+    "/ventas/pedidos/activos/",
+    "/ventas/carta/",
+    "/ventas/cocina/",
+    "/ventas/dashboard/",
+    "/ventas/cajas/",
+]
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    """RSS del master más la de sus workers."""
+    total_kb = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        return None
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for linea in f:
+                    if linea.startswith("VmRSS:"):
+                        total_kb += int(linea.split()[1])
+                        break
+        except OSError:
+            pass
+    return total_kb / 1024
+
+
+def pedir(url):
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as r:
+            r.read()
+            ok = r.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - t0, ok
+
+
+def esperar(url, proceso, limite=60):
+    fin = time.time() + limite
+    while time.time() < fin:
+        if proceso.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=5) as r:
+                r.read()
+                return True
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.3)
+    return False
+
+
+def medir(modelo, args):
+    puerto = puerto_libre()
+    base = f"http://127.0.0.1:{puerto}"
+    entorno = dict(os.environ, PORT=str(puerto), GUNICORN_WORKER_CLASS=modelo)
+    if args.workers:
+        entorno["WEB_CONCURRENCY"] = str(args.workers)
+
+    with tempfile.TemporaryFile(mode="w+") as log:
+        proceso = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+             "--bind", f"127.0.0.1:{puerto}", "--access-logfile", os.devnull],
+            cwd=BASE_DIR, env=entorno, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            if not esperar(base + RUTAS[0], proceso):
+                log.seek(0)
+                print(f"❌ {modelo}: gunicorn no arrancó\n{log.read()[-2000:]}")
+                return None
+
+            urls = [base + r for r in args.rutas]
+            for url in urls * 3:  # calentamiento: cachés y conexiones de cada worker
+                pedir(url)
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(args.concurrencia) as pool:
+                resultados = list(pool.map(pedir, (urls[i % len(urls)] for i in range(args.requests))))
+            duracion = time.perf_counter() - t0
+            memoria = rss_mb(proceso.pid)
+
+            log.seek(0)
+            arranque = next((l.split("Workers: ", 1)[1].strip() for l in log if "Workers: " in l), "?")
+        finally:
+            proceso.terminate()
+            try:
+                proceso.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+
+    latencias = sorted(t * 1000 for t, _ in resultados)
+    q = statistics.quantiles(latencias, n=100)
+    return {
+        "modelo": modelo,
+        "workers": arranque.split(",")[0],
+        "rps": len(resultados) / duracion,
+        "p50": q[49],
+        "p95": q[94],
+        "p99": q[98],
+        "errores": sum(1 for _, ok in resultados if not ok),
+        "rss_mb": memoria,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de modelos de worker de gunicorn")
+    parser.add_argument("--modelos", default="sync,gthread,uvicorn")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--workers", type=int, help="Fija WEB_CONCURRENCY para todos los modelos")
+    parser.add_argument("--rutas", nargs="+", default=RUTAS)
+    args = parser.parse_args()
+
+    filas = []
+    for modelo in args.modelos.split(","):
+        if modelo == "uvicorn" and importlib.util.find_spec("uvicorn") is None:
+            print("⏭️ uvicorn no está instalado (pip install uvicorn): se omite ASGI.")
+            continue
+        print(f"▶ {modelo}...", flush=True)
+        resultado = medir(modelo, args)
+        if resultado:
+            filas.append(resultado)
+
+    if not filas:
+        return
+    print(f"\n{args.requests} requests, concurrencia {args.concurrencia}, {len(args.rutas)} vistas\n")
+    print(f"{'modelo':8} {'workers':26} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errores':>8} {'RSS MB':>8}")
+    for f in filas:
+        rss = f"{f['rss_mb']:8.0f}" if f["rss_mb"] is not None else f"{'?':>8}"
+        print(f"{f['modelo']:8} {f['workers']:26} {f['rps']:8.1f} {f['p50']:8.1f} "
+              f"{f['p95']:8.1f} {f['p99']:8.1f} {f['errores']:8d} {rss}")
+
+
+if __name__ == "__main__":
+    main()
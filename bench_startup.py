@@ -0,0 +1,85 @@
+# bench_startup.py
+# Mide el arranque de un worker: django.setup() + import del URLconf,
+# y la memoria residente (RSS) del proceso al terminar.
+#
+# Cada medición corre en un proceso nuevo para que las importaciones no
+# queden en caché entre corridas.
+#
+#   python bench_startup.py            # 5 corridas
+#   python bench_startup.py --runs 10
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Módulos pesados que no deberían cargarse al arrancar un worker
+PESADOS = ["pandas", "numpy", "openpyxl", "escpos", "qrcode", "PIL"]
+
+HIJO = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cevicheria.settings")
+import django
+django.setup()
+t1 = time.perf_counter()
+from importlib import import_module
+from django.conf import settings
+import_module(settings.ROOT_URLCONF)
+t2 = time.perf_counter()
+
+rss_kb = 0
+with open("/proc/self/status") as f:
+    for linea in f:
+        if linea.startswith("VmRSS:"):
+            rss_kb = int(linea.split()[1])
+            break
+
+print(json.dumps({
+    "setup_ms": (t1 - t0) * 1000,
+    "urls_ms": (t2 - t1) * 1000,
+    "rss_mb": rss_kb / 1024,
+    "cargados": [m for m in %(pesados)r if m in sys.modules],
+}))
+""" % {"pesados": PESADOS}
+
+
+def medir():
+    salida = subprocess.run(
+        [sys.executable, "-c", HIJO],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de worker")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    resultados = [medir() for _ in range(args.runs)]
+
+    for clave, etiqueta in [
+        ("setup_ms", "django.setup()  (ms)"),
+        ("urls_ms", "import URLconf  (ms)"),
+        ("rss_mb", "RSS por worker  (MB)"),
+    ]:
+        valores = [r[clave] for r in resultados]
+        print(f"{etiqueta}: mediana {statistics.median(valores):8.1f}   "
+              f"min {min(valores):8.1f}   max {max(valores):8.1f}")
+
+    cargados = sorted({m for r in resultados for m in r["cargados"]})
+    if cargados:
+        print(f"⚠️ Módulos pesados cargados al arrancar: {', '.join(cargados)}")
+    else:
+        print("✅ Ningún módulo pesado se carga al arrancar.")
+
+
+if __name__ == "__main__":
+    main()
@@ -50,12 +50,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ventas.middleware.CartaAutoservicioMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ventas.middleware.SucursalMiddleware',
+    'ventas.middleware.LecturaReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'cevicheria.urls'
@@ -90,6 +93,54 @@ DATABASES = {
     )
 }
 
+# Bases de datos propias por sucursal (opcional): DATABASE_URL_<ALIAS>=...
+# El alias (en minúsculas) se indica en Sucursal.base_datos.
+for _clave, _url in os.environ.items():
+    if _clave.startswith("DATABASE_URL_") and _url:
+        DATABASES[_clave[len("DATABASE_URL_"):].lower()] = dj_database_url.parse(_url)
+
+# Réplica de solo lectura para reportes (opcional): DATABASE_URL_REPORTING=...
+# Para probar en local sirve otra base SQLite con una copia de los datos.
+if "reporting" in DATABASES:
+    DATABASES["reporting"]["TEST"] = {"MIRROR": "default"}
+
+# Conexiones persistentes: cada worker/hilo reutiliza su conexión durante
+# DB_CONN_MAX_AGE segundos y la verifica antes de usarla tras un corte.
+# Con workers ASGI (uvicorn) gunicorn.conf.py lo deja en 0.
+for _db in DATABASES.values():
+    _db["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+    _db["CONN_HEALTH_CHECKS"] = True
+
+# Segundos que una sesión lee del primario después de escribir
+REPLICA_PRIMARIO_SEGUNDOS = int(os.getenv("REPLICA_PRIMARIO_SEGUNDOS", "10"))
+
+DATABASE_ROUTERS = ["ventas.routers.SucursalRouter", "ventas.routers.ReplicaRouter"]
+
+
+# Caché compartida entre workers (sesiones, pronóstico de compras).
+# Con REDIS_URL usa Redis y las sesiones viven solo en la caché: sin fila en
+# django_session. Si no, archivos en disco (los comparten los workers de la
+# misma máquina, pero se borran en cada deploy y al llenarse se descarta un
+# tercio al azar), así que las sesiones (usuario logueado y sucursal elegida)
+# se leen de la caché pero se guardan también en la base.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+    SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR", str(BASE_DIR / ".cache")),
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
 
 
 # Password validation
@@ -128,6 +179,13 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Archivos generados (carta estática y QRs del autoservicio)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# URL pública con la que se arman los QR de las mesas
+AUTOSERVICIO_URL_BASE = os.getenv("AUTOSERVICIO_URL_BASE", "https://cevicheria-pos.onrender.com")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
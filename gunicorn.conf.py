@@ -0,0 +1,117 @@
+# gunicorn.conf.py
+# Configuración de producción: gunicorn la lee sola desde el directorio actual.
+#
+#   gunicorn                                   # gthread (por defecto)
+#   GUNICORN_WORKER_CLASS=sync gunicorn
+#   GUNICORN_WORKER_CLASS=uvicorn gunicorn     # ASGI (requiere: pip install uvicorn)
+#
+# Variables de entorno:
+#   PORT                   puerto (Render lo define)              → 8000
+#   GUNICORN_WORKER_CLASS  sync | gthread | uvicorn               → gthread
+#   WEB_CONCURRENCY        número de workers (fija el cálculo)    → según CPU y memoria
+#   GUNICORN_THREADS       hilos por worker gthread               → 4
+#   MEMORIA_POR_WORKER_MB  memoria que se reserva por worker      → 150
+import os
+
+# ================= MODELO DE WORKER ==================
+CLASES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "uvicorn": "uvicorn.workers.UvicornWorker",
+}
+modelo = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+worker_class = CLASES.get(modelo, modelo)
+asgi = "uvicorn" in worker_class.lower()
+
+wsgi_app = "cevicheria.asgi:application" if asgi else "cevicheria.wsgi:application"
+
+if asgi:
+    # En ASGI cada request puede usar otro hilo de sync_to_async: las
+    # conexiones persistentes se acumularían sin cerrarse.
+    os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+
+
+# ================= TAMAÑO ==================
+def _cpus():
+    """CPUs utilizables: afinidad del proceso y, si hay, cuota del cgroup."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            cuota, periodo = f.read().split()
+        if cuota != "max":
+            cpus = min(cpus, max(1, int(cuota) // int(periodo)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _memoria_mb():
+    """Memoria disponible: límite del cgroup o MemAvailable. None si no se sabe."""
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limite = f.read().strip()
+        if limite != "max":
+            return int(limite) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for linea in f:
+                if linea.startswith("MemAvailable:"):
+                    return int(linea.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def calcular_workers():
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.getenv("WEB_CONCURRENCY"))
+    cpus = _cpus()
+    # sync: un request por worker → 2·CPU + 1. gthread/uvicorn atienden
+    # varios por worker, así que basta con uno por CPU (+1 para cubrir E/S).
+    por_cpu = 2 * cpus + 1 if worker_class == "sync" else cpus + 1
+    memoria = _memoria_mb()
+    if memoria is None:
+        return por_cpu
+    por_memoria = memoria // int(os.getenv("MEMORIA_POR_WORKER_MB", "150"))
+    return max(1, min(por_cpu, por_memoria))
+
+
+workers = calcular_workers()
+threads = int(os.getenv("GUNICORN_THREADS", "4")) if worker_class == "gthread" else 1
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# La app (Django y las importaciones) se carga una vez en el master y los
+# workers la heredan por fork: arrancan más rápido y comparten memoria.
+preload_app = True
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers de a poco por si algo acumula memoria
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+
+
+# ================= HOOKS ==================
+def pre_fork(server, worker):
+    # Se cierran en el master las conexiones abiertas durante el preload,
+    # antes de crear el worker: si un hijo cerrara una heredada, enviaría el
+    # Terminate por el socket que comparte con los demás procesos.
+    from django.conf import settings
+    if settings.configured:
+        from django.db import connections
+        connections.close_all()
+
+
+def when_ready(server):
+    server.log.info(
+        "Workers: %s × %s (%s hilos c/u), CPUs: %s, memoria: %s MB",
+        workers, worker_class, threads, _cpus(), _memoria_mb(),
+    )
@@ -5,12 +5,13 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cevicheria.settings')
 django.setup()
 
-from ventas.models import Mesa
+from ventas.models import Mesa, sucursal_por_defecto
 from django.contrib.auth.models import User
 
-# Crear 18 mesas si no existen
+# Crear 18 mesas si no existen (en la sucursal principal)
+principal = sucursal_por_defecto()
 for i in range(1, 19):
-    Mesa.objects.get_or_create(numero=i)
+    Mesa.objects.get_or_create(sucursal_id=principal, numero=i)
 
 # Crear superusuario admin si no existe
 if not User.objects.filter(username='CEVICHERIA').exists():
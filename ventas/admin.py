@@ -1,21 +1,36 @@
 from decimal import Decimal
 from django.contrib import admin, messages
 from django import forms
+from django.core.paginator import Paginator
+from django.db import connections
 from django.urls import path
 from django.shortcuts import render, redirect
-from openpyxl import load_workbook
+from django.utils.functional import cached_property
 
-from .models import Plato, Pedido, DetallePedido, Caja, Mesa
+from . import autoservicio
+from .models import (
+    Plato, Pedido, DetallePedido, Caja, Mesa, Sucursal, Estacion, CategoriaEstacion,
+    Ingrediente, Receta,
+)
 
 # ----------------- Formulario para subir Excel -----------------
 class UploadExcelForm(forms.Form):
     file = forms.FileField(help_text="Sube un archivo .xlsx. Cada hoja será una categoría.")
 
+# ----------------- Receta dentro del plato -----------------
+class RecetaInline(admin.TabularInline):
+    model = Receta
+    extra = 1
+    autocomplete_fields = ("ingrediente",)
+
+
 # ----------------- Admin personalizado para Plato -----------------
 class PlatoAdmin(admin.ModelAdmin):
     list_display = ("nombre", "precio", "categoria", "activo")
     search_fields = ("nombre", "categoria")
     list_filter = ("categoria", "activo")
+    filter_horizontal = ("no_disponible_en",)
+    inlines = [RecetaInline]
 
     # ----------------- URLs personalizadas -----------------
     def get_urls(self):
@@ -34,6 +49,9 @@ class PlatoAdmin(admin.ModelAdmin):
         if request.method == "POST":
             form = UploadExcelForm(request.POST, request.FILES)
             if form.is_valid():
+                # Import diferido: openpyxl solo se carga al importar una carta
+                from openpyxl import load_workbook
+
                 file = form.cleaned_data["file"]
                 try:
                     wb = load_workbook(filename=file, data_only=True)
@@ -43,52 +61,54 @@ class PlatoAdmin(admin.ModelAdmin):
 
                 creados, actualizados, omitidos, hojas_ignoradas = 0, 0, 0, []
 
-                for sheet_name in wb.sheetnames:
-                    ws = wb[sheet_name]
-
-                    # Mapeo de encabezados (insensible a mayúsculas)
-                    headers = {}
-                    for idx, cell in enumerate(ws[1], start=1):
-                        if cell.value:
-                            headers[str(cell.value).strip().lower()] = idx
-
-                    # Verificar columnas mínimas
-                    if "producto" not in headers or "precio" not in headers:
-                        hojas_ignoradas.append(sheet_name)
-                        continue
+                # Una sola republicación de la carta QR al terminar
+                with autoservicio.republicacion_agrupada():
+                    for sheet_name in wb.sheetnames:
+                        ws = wb[sheet_name]
 
-                    # Procesar filas
-                    for row in ws.iter_rows(min_row=2):
-                        nombre = row[headers["producto"] - 1].value
-                        precio_val = row[headers["precio"] - 1].value
+                        # Mapeo de encabezados (insensible a mayúsculas)
+                        headers = {}
+                        for idx, cell in enumerate(ws[1], start=1):
+                            if cell.value:
+                                headers[str(cell.value).strip().lower()] = idx
 
-                        if not nombre:
-                            omitidos += 1
+                        # Verificar columnas mínimas
+                        if "producto" not in headers or "precio" not in headers:
+                            hojas_ignoradas.append(sheet_name)
                             continue
 
-                        # Parseo robusto de precio
-                        try:
-                            if isinstance(precio_val, (int, float, Decimal)):
-                                precio = Decimal(str(precio_val))
+                        # Procesar filas
+                        for row in ws.iter_rows(min_row=2):
+                            nombre = row[headers["producto"] - 1].value
+                            precio_val = row[headers["precio"] - 1].value
+
+                            if not nombre:
+                                omitidos += 1
+                                continue
+
+                            # Parseo robusto de precio
+                            try:
+                                if isinstance(precio_val, (int, float, Decimal)):
+                                    precio = Decimal(str(precio_val))
+                                else:
+                                    s = str(precio_val)
+                                    s = s.replace("S/.", "").replace("S/", "").replace("s/.", "").replace("s/", "")
+                                    s = s.replace(" ", "").replace(",", ".")
+                                    filtrado = "".join(ch for ch in s if ch.isdigit() or ch == ".")
+                                    precio = Decimal(filtrado)
+                            except Exception:
+                                omitidos += 1
+                                continue
+
+                            obj, creado = Plato.objects.update_or_create(
+                                nombre=str(nombre).strip(),
+                                categoria=sheet_name.strip(),
+                                defaults={"precio": precio, "activo": True},
+                            )
+                            if creado:
+                                creados += 1
                             else:
-                                s = str(precio_val)
-                                s = s.replace("S/.", "").replace("S/", "").replace("s/.", "").replace("s/", "")
-                                s = s.replace(" ", "").replace(",", ".")
-                                filtrado = "".join(ch for ch in s if ch.isdigit() or ch == ".")
-                                precio = Decimal(filtrado)
-                        except Exception:
-                            omitidos += 1
-                            continue
-
-                        obj, creado = Plato.objects.update_or_create(
-                            nombre=str(nombre).strip(),
-                            categoria=sheet_name.strip(),
-                            defaults={"precio": precio, "activo": True},
-                        )
-                        if creado:
-                            creados += 1
-                        else:
-                            actualizados += 1
+                                actualizados += 1
 
                 # Mensajes finales
                 if hojas_ignoradas:
@@ -105,9 +125,124 @@ class PlatoAdmin(admin.ModelAdmin):
         # Render del formulario (asegúrate de crear este template)
         return render(request, "admin/import_excel.html", {"form": form, "title": "Importar Carta desde Excel"})
 
+# ----------------- Paginador con conteo estimado -----------------
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador para tablas grandes: sin filtros usa la estimación de filas
+    de PostgreSQL (pg_class.reltuples) en lugar de un COUNT(*) completo.
+    Con filtros, o en otros motores, cuenta normalmente.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        connection = connections[qs.db]
+        if connection.vendor == "postgresql" and not qs.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s",
+                    [qs.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # reltuples es -1 (o 0) si la tabla nunca fue analizada
+            if row and row[0] > 0:
+                return int(row[0])
+        return super().count
+
+
+# ----------------- Inline de detalles del pedido -----------------
+class DetallePedidoInline(admin.TabularInline):
+    model = DetallePedido
+    extra = 0
+    fields = ("plato", "cantidad", "estado")
+
+    def get_queryset(self, request):
+        # __str__ usa self.plato: lo traemos en el mismo JOIN
+        return super().get_queryset(request).select_related("plato")
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == "plato":
+            # Evalúa la carta una sola vez para todas las filas del inline
+            # (si no, cada <select> vuelve a consultar Plato).
+            formfield.choices = list(formfield.choices)
+        return formfield
+
+
+# ----------------- Admin de Pedido -----------------
+class PedidoAdmin(admin.ModelAdmin):
+    list_display = ("id", "sucursal", "mesa", "estado", "para_llevar", "creado")
+    list_select_related = ("sucursal", "mesa")
+    list_filter = ("sucursal", "estado", "para_llevar")
+    date_hierarchy = "creado"
+    raw_id_fields = ("mesa",)
+    search_fields = ("=id",)
+    inlines = [DetallePedidoInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+# ----------------- Admin de DetallePedido -----------------
+class DetallePedidoAdmin(admin.ModelAdmin):
+    list_display = ("id", "pedido", "plato", "cantidad", "estado", "creado", "servido_en")
+    list_select_related = ("pedido__mesa", "plato")
+    list_filter = ("estado",)
+    date_hierarchy = "pedido__creado"
+    raw_id_fields = ("pedido",)
+    autocomplete_fields = ("plato",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+# ----------------- Admin de Caja -----------------
+class CajaAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "sucursal", "monto_inicial", "total_vendido", "monto_final", "abierta")
+    list_select_related = ("sucursal",)
+    list_filter = ("sucursal", "abierta")
+    date_hierarchy = "fecha"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+# ----------------- Admin de Mesa -----------------
+class MesaAdmin(admin.ModelAdmin):
+    list_display = ("numero", "sucursal", "esta_ocupada", "es_para_llevar")
+    list_select_related = ("sucursal",)
+    list_filter = ("sucursal", "esta_ocupada", "es_para_llevar")
+    search_fields = ("=numero",)
+
+
+# ----------------- Admin de Sucursal -----------------
+class SucursalAdmin(admin.ModelAdmin):
+    list_display = ("nombre", "codigo", "activa", "base_datos")
+    list_filter = ("activa",)
+    search_fields = ("nombre", "codigo")
+    prepopulated_fields = {"codigo": ("nombre",)}
+
+
+# ----------------- Admin de estaciones de cocina -----------------
+class CategoriaEstacionInline(admin.TabularInline):
+    model = CategoriaEstacion
+    extra = 1
+
+
+class EstacionAdmin(admin.ModelAdmin):
+    list_display = ("nombre", "orden")
+    inlines = [CategoriaEstacionInline]
+
+
+# ----------------- Admin de Ingrediente -----------------
+class IngredienteAdmin(admin.ModelAdmin):
+    list_display = ("nombre", "unidad")
+    search_fields = ("nombre",)
+
+
 # ----------------- Registro de modelos -----------------
 admin.site.register(Plato, PlatoAdmin)
-admin.site.register(Pedido)
-admin.site.register(DetallePedido)
-admin.site.register(Caja)
-admin.site.register(Mesa)
+admin.site.register(Pedido, PedidoAdmin)
+admin.site.register(DetallePedido, DetallePedidoAdmin)
+admin.site.register(Caja, CajaAdmin)
+admin.site.register(Mesa, MesaAdmin)
+admin.site.register(Sucursal, SucursalAdmin)
+admin.site.register(Estacion, EstacionAdmin)
+admin.site.register(Ingrediente, IngredienteAdmin)
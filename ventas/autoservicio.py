@@ -0,0 +1,231 @@
+# ventas/autoservicio.py
+"""
+Autoservicio por QR.
+
+Cada mesa tiene un código QR que abre la carta para esa mesa. La carta es
+un snapshot estático (JSON + HTML) de los platos disponibles en la
+sucursal, versionado por contenido, que se sirve como archivo sin tocar la
+base de datos. Se republica sola cuando cambian los platos (ventas/signals.py).
+Solo el envío del pedido llega a Django: se rechaza si la carta que vio el
+cliente ya no es la vigente, y si no se suma al pedido abierto de la mesa.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import router, transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .models import Mesa, Plato, Pedido, DetallePedido, Sucursal, tocar_pedidos
+
+SALT_MESA = "ventas.autoservicio.mesa"
+# Tope de porciones de un mismo plato por envío desde la carta QR
+MAX_CANTIDAD = 99
+
+
+# ================= RUTAS ==================
+def directorio(sucursal):
+    """Carpeta (dentro de MEDIA_ROOT) donde se publican carta y QRs de la sucursal."""
+    return Path(settings.MEDIA_ROOT) / "autoservicio" / sucursal.codigo
+
+
+def ruta_qr(mesa):
+    return directorio(mesa.sucursal) / "qr" / f"mesa-{mesa.numero}.png"
+
+
+def _escribir(ruta, contenido):
+    """Escritura atómica: nadie lee un archivo a medio escribir."""
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(ruta.name + ".tmp")
+    if isinstance(contenido, str):
+        contenido = contenido.encode("utf-8")
+    tmp.write_bytes(contenido)
+    os.replace(tmp, ruta)
+
+
+# ================= TOKEN DE MESA ==================
+def token_mesa(mesa):
+    """Token firmado (determinista) que identifica sucursal y mesa en el QR."""
+    return signing.dumps([mesa.sucursal_id, mesa.id], salt=SALT_MESA)
+
+
+def mesa_desde_token(token):
+    """Devuelve (sucursal_id, mesa_id); lanza signing.BadSignature si fue alterado."""
+    sucursal_id, mesa_id = signing.loads(token, salt=SALT_MESA)
+    return sucursal_id, mesa_id
+
+
+def url_carta_mesa(mesa):
+    base = settings.AUTOSERVICIO_URL_BASE.rstrip("/")
+    return (
+        f"{base}{settings.MEDIA_URL}autoservicio/{mesa.sucursal.codigo}/"
+        f"carta.html?mesa={token_mesa(mesa)}"
+    )
+
+
+# ================= SNAPSHOT DE LA CARTA ==================
+def construir_snapshot(sucursal):
+    """Carta de la sucursal como dict serializable, con versión = hash del contenido."""
+    platos = list(
+        Plato.objects.filter(activo=True)
+        .exclude(no_disponible_en=sucursal)
+        .order_by("categoria", "nombre")
+        .values("id", "nombre", "categoria", "precio")
+    )
+    for plato in platos:
+        plato["precio"] = str(plato["precio"])
+    contenido = json.dumps(platos, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    version = hashlib.sha256(contenido).hexdigest()[:12]
+    return {"version": version, "platos": platos}
+
+
+def publicar_carta(sucursal):
+    """
+    Genera carta.json, carta-<version>.json (inmutable) y carta.html de la
+    sucursal. Devuelve la versión publicada.
+    """
+    snapshot = construir_snapshot(sucursal)
+    base = directorio(sucursal)
+    datos = json.dumps(snapshot, ensure_ascii=False)
+
+    versionado = base / f"carta-{snapshot['version']}.json"
+    if not versionado.exists():
+        _escribir(versionado, datos)
+    _escribir(base / "carta.json", datos)
+
+    platos_por_categoria = defaultdict(list)
+    for plato in snapshot["platos"]:
+        platos_por_categoria[plato["categoria"]].append(plato)
+
+    html = render_to_string("ventas/autoservicio_carta.html", {
+        "version": snapshot["version"],
+        "platos_por_categoria": dict(platos_por_categoria),
+        "url_pedido": reverse("autoservicio_pedido"),
+    })
+    _escribir(base / "carta.html", html)
+    return snapshot["version"]
+
+
+def version_publicada(sucursal):
+    try:
+        with open(directorio(sucursal) / "carta.json", encoding="utf-8") as f:
+            return json.load(f)["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def version_actual(sucursal):
+    """Versión de la carta según la base; si la publicada quedó atrás, la republica."""
+    version = construir_snapshot(sucursal)["version"]
+    if version_publicada(sucursal) != version:
+        publicar_carta(sucursal)
+    return version
+
+
+# ================= REPUBLICACIÓN AUTOMÁTICA ==================
+# Las señales de Plato (ventas/signals.py) programan la republicación para
+# cuando se confirme la transacción: una sola vez por transacción, y una
+# sola vez por bloque dentro de republicacion_agrupada() (importaciones).
+_agrupando = ContextVar("republicacion_agrupada", default=None)
+
+
+def republicar():
+    """Publica la carta de todas las sucursales activas."""
+    for sucursal in Sucursal.objects.using("default").filter(activa=True):
+        publicar_carta(sucursal)
+
+
+def programar_republicacion(using="default"):
+    cambios = _agrupando.get()
+    if cambios is not None:
+        cambios.append(using)
+        return
+    conexion = transaction.get_connection(using)
+    if conexion.in_atomic_block and any(f is republicar for _, f, _ in conexion.run_on_commit):
+        return
+    # robust: si falla la escritura en disco se registra, el cambio ya se guardó
+    transaction.on_commit(republicar, using=using, robust=True)
+
+
+@contextmanager
+def republicacion_agrupada():
+    """Los cambios de platos dentro del bloque republican una sola vez, al salir."""
+    cambios = []
+    token = _agrupando.set(cambios)
+    try:
+        yield
+    finally:
+        _agrupando.reset(token)
+        if cambios:
+            programar_republicacion(cambios[0])
+
+
+# ================= CÓDIGOS QR ==================
+def generar_qr(mesa, forzar=False):
+    """Genera (una sola vez) el PNG del QR de la mesa y devuelve su ruta."""
+    ruta = ruta_qr(mesa)
+    if ruta.exists() and not forzar:
+        return ruta
+
+    # Import diferido: qrcode/pillow solo se cargan al generar códigos
+    import io
+    import qrcode
+
+    buffer = io.BytesIO()
+    qrcode.make(url_carta_mesa(mesa)).save(buffer, format="PNG")
+    _escribir(ruta, buffer.getvalue())
+    return ruta
+
+
+# ================= PEDIDO DESDE LA CARTA ==================
+class PedidoInvalido(Exception):
+    pass
+
+
+def registrar_pedido(sucursal, mesa_id, items, version):
+    """
+    Suma los items ({plato_id: cantidad}) al pedido abierto de la mesa,
+    creándolo si no existe. `version` es la de la carta que vio el cliente:
+    si ya no es la vigente (cambió un precio o un plato), se rechaza.
+    Devuelve el Pedido.
+    """
+    items = {plato_id: cantidad for plato_id, cantidad in items.items() if cantidad > 0}
+    if not items:
+        raise PedidoInvalido("El pedido está vacío.")
+    if version != version_actual(sucursal):
+        raise PedidoInvalido("La carta cambió, recarga la página.")
+
+    platos = Plato.objects.filter(id__in=items, activo=True)\
+        .exclude(no_disponible_en=sucursal).in_bulk()
+    if len(platos) != len(items):
+        raise PedidoInvalido("La carta cambió, recarga la página.")
+
+    with transaction.atomic(using=router.db_for_write(Mesa)):
+        mesa = Mesa.objects.select_for_update().get(id=mesa_id, sucursal=sucursal)
+        pedido = Pedido.objects.filter(mesa=mesa, estado="abierto").first()
+        if pedido is None:
+            pedido = Pedido.objects.create(sucursal=sucursal, mesa=mesa)
+            mesa.esta_ocupada = True
+            mesa.save()
+
+        # Solo se suma a líneas aún pendientes: lo ya enviado a cocina conserva sus tiempos
+        existentes = {d.plato_id: d for d in pedido.detalles.filter(estado="pendiente")}
+        nuevos = []
+        for plato_id, cantidad in items.items():
+            detalle = existentes.get(plato_id)
+            if detalle:
+                detalle.cantidad += cantidad
+                detalle.save(update_fields=["cantidad"])
+            else:
+                nuevos.append(DetallePedido(pedido=pedido, plato_id=plato_id, cantidad=cantidad))
+        if nuevos:
+            DetallePedido.objects.bulk_create(nuevos)
+            tocar_pedidos([pedido.pk], pedido._state.db)
+    return pedido
@@ -0,0 +1,131 @@
+# ventas/cocina.py
+"""
+Cola de cocina y tiempos de preparación por estación.
+
+La estación de cada línea sale de Plato.categoria (CategoriaEstacion) y se
+calcula en SQL con un CASE, así que agrupar y ordenar por estación no
+trae filas a Python. Las categorías sin estación van a ESTACION_POR_DEFECTO.
+"""
+from django.db import connections
+from django.db.models import (
+    Aggregate, Avg, Case, Count, DurationField, ExpressionWrapper, F, Value, When,
+)
+from django.utils import timezone
+
+from .models import CategoriaEstacion, DetallePedido, Estacion
+
+ESTACION_POR_DEFECTO = "Cocina"
+
+
+def expresion_estacion():
+    """CASE plato.categoria WHEN ... THEN <estación> con el mapeo actual."""
+    mapeo = {}
+    for categoria, estacion in CategoriaEstacion.objects.values_list("categoria", "estacion__nombre"):
+        mapeo.setdefault(estacion, []).append(categoria)
+    if not mapeo:
+        return Value(ESTACION_POR_DEFECTO)
+    return Case(
+        *[When(plato__categoria__in=categorias, then=Value(estacion))
+          for estacion, categorias in mapeo.items()],
+        default=Value(ESTACION_POR_DEFECTO),
+    )
+
+
+def orden_estaciones():
+    """Nombres de estación en el orden configurado, con la de por defecto al final."""
+    nombres = list(Estacion.objects.values_list("nombre", flat=True))
+    if ESTACION_POR_DEFECTO not in nombres:
+        nombres.append(ESTACION_POR_DEFECTO)
+    return nombres
+
+
+# ================= COLA DE COCINA ==================
+def cola_por_estacion(sucursal):
+    """
+    Líneas pendientes o en preparación de la sucursal, agrupadas por estación
+    y ordenadas por tiempo de espera (la más antigua primero).
+    """
+    ahora = timezone.now()
+    detalles = (
+        DetallePedido.objects
+        .filter(pedido__sucursal=sucursal, pedido__estado="abierto",
+                estado__in=["pendiente", "preparando"])
+        .select_related("plato", "pedido__mesa")
+        .annotate(estacion=expresion_estacion())
+        .order_by("creado", "id")
+    )
+
+    cola = {nombre: [] for nombre in orden_estaciones()}
+    for detalle in detalles:
+        detalle.espera_min = int((ahora - detalle.creado).total_seconds() // 60)
+        cola.setdefault(detalle.estacion, []).append(detalle)
+    return {estacion: lineas for estacion, lineas in cola.items() if lineas}
+
+
+# ================= LATENCIAS (p50 / p95) ==================
+class Percentil(Aggregate):
+    """PERCENTILE_CONT(p) WITHIN GROUP (ORDER BY expr) — solo PostgreSQL."""
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(percentil)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = DurationField()
+
+    def __init__(self, expression, percentil, **extra):
+        super().__init__(expression, percentil=percentil, **extra)
+
+
+def _servidos(sucursal, desde, hasta):
+    return (
+        DetallePedido.objects
+        .filter(pedido__sucursal=sucursal, servido_en__gte=desde, servido_en__lt=hasta)
+        .annotate(
+            estacion=expresion_estacion(),
+            latencia=ExpressionWrapper(F("servido_en") - F("creado"), output_field=DurationField()),
+        )
+    )
+
+
+def latencias_por_estacion(sucursal, desde, hasta):
+    """
+    Por estación: líneas servidas, promedio, p50 y p95 del tiempo entre el
+    pedido de la línea (creado) y su entrega (servido_en), para las líneas
+    servidas en [desde, hasta). Cada duración viene también en minutos
+    (promedio_min, p50_min, p95_min).
+    """
+    servidos = _servidos(sucursal, desde, hasta)
+    grupos = servidos.values("estacion").order_by("estacion")
+    postgres = connections[servidos.db].vendor == "postgresql"
+
+    if postgres:
+        filas = list(grupos.annotate(
+            lineas=Count("id"),
+            promedio=Avg("latencia"),
+            p50=Percentil("latencia", 0.5),
+            p95=Percentil("latencia", 0.95),
+        ))
+    else:
+        filas = list(grupos.annotate(lineas=Count("id"), promedio=Avg("latencia")))
+    # Sin CategoriaEstacion la estación es una constante y no hay GROUP BY
+    # real: un día sin líneas servidas devuelve una fila con 0 líneas.
+    filas = [fila for fila in filas if fila["lineas"]]
+
+    if not postgres:
+        # Sin PERCENTILE_CONT: percentil por rango más cercano, cada uno con
+        # un ORDER BY latencia LIMIT 1 OFFSET k sobre el índice de servido_en.
+        for fila in filas:
+            ordenados = servidos.filter(estacion=fila["estacion"]).order_by("latencia")
+            for clave, p in (("p50", 0.5), ("p95", 0.95)):
+                k = max(int(round(p * fila["lineas"])) - 1, 0)
+                fila[clave] = ordenados.values_list("latencia", flat=True)[k]
+
+    for fila in filas:
+        for clave in ("promedio", "p50", "p95"):
+            fila[f"{clave}_min"] = _minutos(fila[clave])
+
+    orden = {nombre: i for i, nombre in enumerate(orden_estaciones())}
+    return sorted(filas, key=lambda f: orden.get(f["estacion"], len(orden)))
+
+
+def _minutos(duracion):
+    if duracion is None:
+        return None
+    return round(duracion.total_seconds() / 60, 1)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ventas import autoservicio
+from ventas.models import Mesa, Sucursal
+from ventas.sucursales import usar_sucursal
+
+
+class Command(BaseCommand):
+    help = "Publica la carta estática del autoservicio y genera los QR de las mesas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--forzar-qr",
+            action="store_true",
+            help="Regenera los QR aunque ya existan (p. ej. si cambió la URL base).",
+        )
+
+    def handle(self, *args, **options):
+        for sucursal in Sucursal.objects.using("default").filter(activa=True):
+            with usar_sucursal(sucursal):
+                version = autoservicio.publicar_carta(sucursal)
+                self.stdout.write(
+                    f"{sucursal}: carta publicada (versión {version}) en {autoservicio.directorio(sucursal)}"
+                )
+
+                mesas = Mesa.objects.filter(sucursal=sucursal, es_para_llevar=False)\
+                    .select_related("sucursal")
+                for mesa in mesas:
+                    autoservicio.generar_qr(mesa, forzar=options["forzar_qr"])
+                self.stdout.write(self.style.SUCCESS(f"✅ {sucursal}: QR listos para {len(mesas)} mesas."))
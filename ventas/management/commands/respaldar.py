@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ventas import respaldo
+
+
+class Command(BaseCommand):
+    help = "Respalda catálogo y ventas en JSONL comprimido (completo o incremental)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salida", default="respaldos", help="Carpeta de los respaldos.")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Solo lo modificado desde el último respaldo de esta carpeta.",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        carpeta = Path(options["salida"])
+        carpeta.mkdir(parents=True, exist_ok=True)
+        estado = carpeta / "estado.json"
+
+        desde = None
+        if options["incremental"]:
+            if not estado.exists():
+                raise CommandError("No hay un respaldo previo en esta carpeta; haz primero uno completo.")
+            desde = json.loads(estado.read_text())["marcas"]
+            if "actualizado" not in desde:
+                raise CommandError(
+                    "El último respaldo es de un formato anterior; haz primero uno completo."
+                )
+
+        tipo = "incremental" if desde else "completo"
+        ruta = carpeta / f"ventas-{timezone.now():%Y%m%d-%H%M%S}-{tipo}.jsonl.gz"
+        marcas, conteo = respaldo.respaldar(ruta, db=options["database"], desde=desde)
+
+        estado.write_text(json.dumps({"ultimo": ruta.name, "marcas": marcas}, indent=2))
+        resumen = ", ".join(f"{clave}: {n}" for clave, n in conteo.items())
+        self.stdout.write(self.style.SUCCESS(f"✅ Respaldo {tipo} en {ruta} ({resumen})"))
@@ -0,0 +1,30 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from ventas import respaldo
+
+
+class Command(BaseCommand):
+    help = (
+        "Restaura respaldos de `respaldar`. Indica el completo y luego los "
+        "incrementales, en orden. El completo va a una base recién migrada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivos", nargs="+")
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        for archivo in options["archivos"]:
+            try:
+                conteo = respaldo.restaurar(archivo, db=options["database"])
+            except (OSError, ValueError, KeyError, ValidationError) as e:
+                raise CommandError(f"No se pudo restaurar {archivo}: {e}")
+            except IntegrityError as e:
+                raise CommandError(
+                    f"No se pudo restaurar {archivo}: la base destino debe estar vacía "
+                    f"o tener los mismos ids que el respaldo ({e})."
+                )
+            resumen = ", ".join(f"{clave}: {n}" for clave, n in conteo.items())
+            self.stdout.write(self.style.SUCCESS(f"✅ {archivo} restaurado ({resumen})"))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ventas.models import (
+    Sucursal, Plato, Estacion, CategoriaEstacion, Ingrediente, Receta,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia el catálogo (sucursales, platos, su disponibilidad, estaciones y recetas) "
+        "desde la base 'default' a las bases propias de cada sucursal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sucursal", help="Código de una sola sucursal a sincronizar.")
+
+    def handle(self, *args, **options):
+        destinos = Sucursal.objects.using("default").exclude(base_datos="")
+        if options["sucursal"]:
+            destinos = destinos.filter(codigo=options["sucursal"])
+        if not destinos:
+            raise CommandError("No hay sucursales con base de datos propia para sincronizar.")
+
+        sucursales = list(Sucursal.objects.using("default").all())
+        platos = list(Plato.objects.using("default").all())
+        Disponibilidad = Plato.no_disponible_en.through
+        disponibilidad = list(Disponibilidad.objects.using("default").all())
+        estaciones = list(Estacion.objects.using("default").all())
+        categorias = list(CategoriaEstacion.objects.using("default").all())
+        ingredientes = list(Ingrediente.objects.using("default").all())
+        recetas = list(Receta.objects.using("default").all())
+
+        for alias in sorted({s.base_datos for s in destinos}):
+            with transaction.atomic(using=alias):
+                for sucursal in sucursales:
+                    sucursal.save(using=alias)
+                for plato in platos:
+                    plato.save(using=alias)
+                # Los platos que ya no están en el catálogo se desactivan, nunca
+                # se borran: DetallePedido los referencia (on_delete=CASCADE).
+                Plato.objects.using(alias).exclude(
+                    pk__in=[p.pk for p in platos]
+                ).update(activo=False)
+
+                Disponibilidad.objects.using(alias).all().delete()
+                Disponibilidad.objects.using(alias).bulk_create(disponibilidad)
+
+                # Estaciones de cocina: la asignación por categoría se reemplaza completa
+                for estacion in estaciones:
+                    estacion.save(using=alias)
+                CategoriaEstacion.objects.using(alias).all().delete()
+                CategoriaEstacion.objects.using(alias).bulk_create(categorias)
+                Estacion.objects.using(alias).exclude(pk__in=[e.pk for e in estaciones]).delete()
+
+                for ingrediente in ingredientes:
+                    ingrediente.save(using=alias)
+                Receta.objects.using(alias).all().delete()
+                Receta.objects.using(alias).bulk_create(recetas)
+
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {alias}: {len(sucursales)} sucursales, {len(platos)} platos."
+            ))
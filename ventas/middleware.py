@@ -0,0 +1,71 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from whitenoise import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import replica, sucursales
+
+
+class CartaAutoservicioMiddleware:
+    """
+    Sirve MEDIA_ROOT/autoservicio (carta.html, carta.json, QRs) antes de la
+    sesión y la sucursal: mirar la carta desde el teléfono no toca la base.
+    Va justo después de SecurityMiddleware y funciona también sin DEBUG.
+    La carta se republica en caliente, así que los archivos se buscan en
+    disco en cada request (autorefresh) en vez de indexarse al arrancar.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefijo = "/" + settings.MEDIA_URL.strip("/") + "/autoservicio/"
+        # max_age=0: el navegador revalida (ETag) y ve enseguida la carta nueva
+        self.archivos = WhiteNoise(None, autorefresh=True, max_age=0)
+        self.archivos.add_files(Path(settings.MEDIA_ROOT) / "autoservicio", prefix=self.prefijo)
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefijo):
+            archivo = self.archivos.find_file(request.path_info)
+            if archivo is not None:
+                return WhiteNoiseMiddleware.serve(archivo, request)
+        return self.get_response(request)
+
+
+class SucursalMiddleware:
+    """Fija la sucursal del request (request.sucursal) mientras dura la vista."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.sucursal = sucursales.resolver_sucursal(request)
+        token = sucursales.fijar(request.sucursal)
+        try:
+            return self.get_response(request)
+        finally:
+            sucursales.liberar(token)
+
+
+class LecturaReplicaMiddleware:
+    """
+    Leer-lo-que-escribí: si el request escribió en ventas, la sesión lee del
+    primario durante REPLICA_PRIMARIO_SEGUNDOS (lo que tarda la réplica en
+    alcanzarlo). Va después de SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica.replica_configurada():
+            return self.get_response(request)
+
+        ahora = time.time()
+        tokens = replica.iniciar_request(ahora < request.session.get(replica.SESSION_KEY, 0))
+        try:
+            return self.get_response(request)
+        finally:
+            if replica.hubo_escritura():
+                request.session[replica.SESSION_KEY] = ahora + settings.REPLICA_PRIMARIO_SEGUNDOS
+            replica.terminar_request(tokens)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0002_add_esta_ocupada'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='detallepedido',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('servido', 'Servido')], db_index=True, default='pendiente', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='creado',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estado', 'creado'], name='pedido_estado_creado_idx'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def asignar_sucursal_principal(apps, schema_editor):
+    """Crea la sucursal 'principal' y le asigna mesas, pedidos y cajas existentes."""
+    db = schema_editor.connection.alias
+    Sucursal = apps.get_model("ventas", "Sucursal")
+    principal, _ = Sucursal.objects.using(db).get_or_create(
+        codigo="principal", defaults={"nombre": "Principal"}
+    )
+    for nombre in ("Mesa", "Pedido", "Caja"):
+        apps.get_model("ventas", nombre).objects.using(db).update(sucursal=principal)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0003_admin_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sucursal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('codigo', models.SlugField(max_length=30, unique=True)),
+                ('activa', models.BooleanField(default=True)),
+                ('base_datos', models.CharField(blank=True, default='', max_length=50)),
+            ],
+            options={
+                'verbose_name_plural': 'sucursales',
+                'ordering': ['nombre'],
+            },
+        ),
+        # Primero nullable, se rellena con la sucursal principal (RunPython) y luego
+        # se vuelve obligatorio, sin default: nunca se llama al modelo real
+        migrations.AddField(
+            model_name='caja',
+            name='sucursal',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='cajas', to='ventas.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='sucursal',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='mesas', to='ventas.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='sucursal',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pedidos', to='ventas.sucursal'),
+        ),
+        migrations.RunPython(asignar_sucursal_principal, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='caja',
+            name='sucursal',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='cajas', to='ventas.sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='mesa',
+            name='sucursal',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='mesas', to='ventas.sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='sucursal',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='pedidos', to='ventas.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='plato',
+            name='no_disponible_en',
+            field=models.ManyToManyField(blank=True, related_name='platos_no_disponibles', to='ventas.sucursal'),
+        ),
+        # Unicidad por sucursal en lugar de global
+        migrations.AlterField(
+            model_name='caja',
+            name='fecha',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AlterField(
+            model_name='mesa',
+            name='numero',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name='caja',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'fecha'), name='caja_sucursal_fecha_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='mesa',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'numero'), name='mesa_sucursal_numero_uniq'),
+        ),
+        # Índices compuestos que empiezan por sucursal
+        migrations.RemoveIndex(
+            model_name='pedido',
+            name='pedido_estado_creado_idx',
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['sucursal', 'estado', 'creado'], name='pedido_suc_estado_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['sucursal', 'creado'], name='pedido_suc_creado_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def creado_desde_pedido(apps, schema_editor):
+    """Las líneas existentes toman como hora de creación la de su pedido."""
+    db = schema_editor.connection.alias
+    DetallePedido = apps.get_model("ventas", "DetallePedido")
+    Pedido = apps.get_model("ventas", "Pedido")
+    DetallePedido.objects.using(db).update(
+        creado=models.Subquery(
+            Pedido.objects.using(db).filter(pk=models.OuterRef("pedido_id")).values("creado")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0004_sucursales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Estacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('orden', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'estaciones',
+                'ordering': ['orden', 'nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoriaEstacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categoria', models.CharField(max_length=50, unique=True)),
+                ('estacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categorias', to='ventas.estacion')),
+            ],
+            options={
+                'verbose_name_plural': 'categorías por estación',
+                'ordering': ['categoria'],
+            },
+        ),
+        # Primero nullable, se rellena con la hora del pedido y luego auto_now_add
+        migrations.AddField(
+            model_name='detallepedido',
+            name='creado',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(creado_desde_pedido, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='detallepedido',
+            name='creado',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AddField(
+            model_name='detallepedido',
+            name='iniciado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='detallepedido',
+            name='servido_en',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='detallepedido',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('preparando', 'En preparación'), ('servido', 'Servido')], default='pendiente', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='detallepedido',
+            index=models.Index(fields=['estado', 'creado'], name='detalle_estado_creado_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0005_tiempos_cocina'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingrediente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+                ('unidad', models.CharField(default='kg', max_length=20)),
+            ],
+            options={
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Receta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('ingrediente', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recetas', to='ventas.ingrediente')),
+                ('plato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receta', to='ventas.plato')),
+            ],
+            options={
+                'unique_together': {('plato', 'ingrediente')},
+            },
+        ),
+    ]
@@ -2,14 +2,50 @@ from django.db import models
 from django.utils import timezone
 from decimal import Decimal
 
+# ================= SUCURSAL =================
+class Sucursal(models.Model):
+    nombre = models.CharField(max_length=100)
+    codigo = models.SlugField(max_length=30, unique=True)
+    activa = models.BooleanField(default=True)
+    # Alias en settings.DATABASES si la sucursal tiene su propia base de datos
+    base_datos = models.CharField(max_length=50, blank=True, default="")
+
+    class Meta:
+        ordering = ["nombre"]
+        verbose_name_plural = "sucursales"
+
+    def __str__(self):
+        return self.nombre
+
+
+def sucursal_por_defecto():
+    """
+    Id de la sucursal 'principal' (instalaciones de un solo local); la crea si
+    no existe. Mesas, pedidos y cajas no la toman como default: siempre se
+    crean con una sucursal explícita.
+    """
+    sucursal, _ = Sucursal.objects.using("default").get_or_create(
+        codigo="principal", defaults={"nombre": "Principal"}
+    )
+    return sucursal.pk
+
+
 # ================= MESA =================
 class Mesa(models.Model):
-    numero = models.PositiveIntegerField(unique=True)
+    # Sin índice propio: el UniqueConstraint (sucursal, numero) ya empieza por sucursal
+    sucursal = models.ForeignKey(
+        Sucursal, on_delete=models.PROTECT, related_name="mesas",
+        db_index=False,
+    )
+    numero = models.PositiveIntegerField()
     esta_ocupada = models.BooleanField(default=False)
     es_para_llevar = models.BooleanField(default=False)
 
     class Meta:
         ordering = ["numero"]
+        constraints = [
+            models.UniqueConstraint(fields=["sucursal", "numero"], name="mesa_sucursal_numero_uniq"),
+        ]
 
     def __str__(self):
         estado = "Ocupada" if self.esta_ocupada else "Libre"
@@ -22,6 +58,10 @@ class Plato(models.Model):
     precio = models.DecimalField(max_digits=8, decimal_places=2)
     categoria = models.CharField(max_length=50, default="Otros", db_index=True)
     activo = models.BooleanField(default=True)
+    # Disponibilidad por sucursal: por defecto un plato activo se ofrece en todas
+    no_disponible_en = models.ManyToManyField(
+        Sucursal, blank=True, related_name="platos_no_disponibles"
+    )
 
     class Meta:
         unique_together = ("nombre", "categoria")
@@ -31,6 +71,31 @@ class Plato(models.Model):
         return f"{self.nombre} ({self.categoria}) - S/ {self.precio}"
 
 
+# ================= INGREDIENTES Y RECETAS =================
+class Ingrediente(models.Model):
+    nombre = models.CharField(max_length=100, unique=True)
+    unidad = models.CharField(max_length=20, default="kg")
+
+    class Meta:
+        ordering = ["nombre"]
+
+    def __str__(self):
+        return f"{self.nombre} ({self.unidad})"
+
+
+class Receta(models.Model):
+    """Cantidad de un ingrediente que lleva una porción de un plato."""
+    plato = models.ForeignKey(Plato, on_delete=models.CASCADE, related_name="receta")
+    ingrediente = models.ForeignKey(Ingrediente, on_delete=models.PROTECT, related_name="recetas")
+    cantidad = models.DecimalField(max_digits=10, decimal_places=3)
+
+    class Meta:
+        unique_together = ("plato", "ingrediente")
+
+    def __str__(self):
+        return f"{self.plato.nombre}: {self.cantidad} {self.ingrediente.unidad} de {self.ingrediente.nombre}"
+
+
 # ================= PEDIDO =================
 class Pedido(models.Model):
     ESTADOS = [
@@ -39,15 +104,26 @@ class Pedido(models.Model):
         ("cancelado", "Cancelado"),
     ]
 
+    # Sin índice propio: los índices compuestos de Meta empiezan por sucursal
+    sucursal = models.ForeignKey(
+        Sucursal, on_delete=models.PROTECT, related_name="pedidos",
+        db_index=False,
+    )
     # 🔧 Cambiamos para permitir pedidos sin mesa física
     mesa = models.ForeignKey(Mesa, on_delete=models.SET_NULL, null=True, blank=True)
 
-    creado = models.DateTimeField(auto_now_add=True)
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
     estado = models.CharField(max_length=10, choices=ESTADOS, default="abierto")
     para_llevar = models.BooleanField(default=False)
+    # Último cambio del pedido o de sus detalles (marca del respaldo incremental)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["-creado"]
+        indexes = [
+            models.Index(fields=["sucursal", "estado", "creado"], name="pedido_suc_estado_creado_idx"),
+            models.Index(fields=["sucursal", "creado"], name="pedido_suc_creado_idx"),
+        ]
 
     @property
     def total(self):
@@ -72,37 +148,113 @@ class Pedido(models.Model):
         return f"Pedido {self.id} - {mesa_info} ({self.estado})"
 
 
+def tocar_pedidos(ids, using=None):
+    """Marca los pedidos como modificados (cambió alguno de sus detalles)."""
+    Pedido.objects.using(using).filter(pk__in=ids).update(actualizado=timezone.now())
+
+
 # ================= DETALLE PEDIDO =================
 class DetallePedido(models.Model):
+    ESTADOS = [
+        ("pendiente", "Pendiente"),
+        ("preparando", "En preparación"),
+        ("servido", "Servido"),
+    ]
+
     pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE, related_name="detalles")
     plato = models.ForeignKey(Plato, on_delete=models.CASCADE)
     cantidad = models.PositiveIntegerField(default=1)
-    estado = models.CharField(
-        max_length=20,
-        choices=[("pendiente", "Pendiente"), ("servido", "Servido")],
-        default="pendiente",
-    )
+    estado = models.CharField(max_length=20, choices=ESTADOS, default="pendiente")
+
+    # Tiempos de cocina: pedido → en preparación → servido
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    servido_en = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Cola de cocina: pendientes/preparando por antigüedad
+            models.Index(fields=["estado", "creado"], name="detalle_estado_creado_idx"),
+        ]
 
     @property
     def subtotal(self):
         return self.cantidad * self.plato.precio
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        tocar_pedidos([self.pedido_id], self._state.db)
+
+    def delete(self, *args, **kwargs):
+        pedido_id, db = self.pedido_id, self._state.db
+        resultado = super().delete(*args, **kwargs)
+        tocar_pedidos([pedido_id], db)
+        return resultado
+
+    def iniciar(self):
+        self.estado = "preparando"
+        self.iniciado = timezone.now()
+        self.save(update_fields=["estado", "iniciado"])
+
+    def servir(self):
+        ahora = timezone.now()
+        self.estado = "servido"
+        self.iniciado = self.iniciado or ahora
+        self.servido_en = ahora
+        self.save(update_fields=["estado", "iniciado", "servido_en"])
+
     def __str__(self):
         return f"{self.plato.nombre} x{self.cantidad}"
 
 
+# ================= ESTACIONES DE COCINA =================
+class Estacion(models.Model):
+    """Estación de cocina (barra fría, plancha, bebidas...)."""
+    nombre = models.CharField(max_length=50, unique=True)
+    orden = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["orden", "nombre"]
+        verbose_name_plural = "estaciones"
+
+    def __str__(self):
+        return self.nombre
+
+
+class CategoriaEstacion(models.Model):
+    """Qué estación prepara cada categoría de la carta (Plato.categoria)."""
+    categoria = models.CharField(max_length=50, unique=True)
+    estacion = models.ForeignKey(Estacion, on_delete=models.CASCADE, related_name="categorias")
+
+    class Meta:
+        ordering = ["categoria"]
+        verbose_name_plural = "categorías por estación"
+
+    def __str__(self):
+        return f"{self.categoria} → {self.estacion}"
+
+
 # ================= CAJA =================
 class Caja(models.Model):
-    fecha = models.DateField(unique=True, default=timezone.localdate)
+    # Sin índice propio: el UniqueConstraint (sucursal, fecha) ya empieza por sucursal
+    sucursal = models.ForeignKey(
+        Sucursal, on_delete=models.PROTECT, related_name="cajas",
+        db_index=False,
+    )
+    fecha = models.DateField(default=timezone.localdate)
     monto_inicial = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     total_vendido = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     monto_final = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     abierta = models.BooleanField(default=True)
     fecha_apertura = models.DateTimeField(default=timezone.now)
     fecha_cierre = models.DateTimeField(null=True, blank=True)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["-fecha"]
+        constraints = [
+            models.UniqueConstraint(fields=["sucursal", "fecha"], name="caja_sucursal_fecha_uniq"),
+        ]
 
     def cerrar(self, monto_final=None):
         if monto_final is not None:
@@ -114,7 +266,9 @@ class Caja(models.Model):
         self.save()
 
     def calcular_total_vendido(self):
-        pedidos = Pedido.objects.filter(creado__date=self.fecha, estado="cerrado")
+        pedidos = Pedido.objects.filter(
+            sucursal_id=self.sucursal_id, creado__date=self.fecha, estado="cerrado"
+        )
         self.total_vendido = sum((p.total for p in pedidos), Decimal("0.00"))
         self.save()
         return self.total_vendido
@@ -0,0 +1,101 @@
+# ventas/paginacion.py
+"""
+Paginación por keyset (seek) para listados e historiales.
+
+En lugar de OFFSET y COUNT(*), cada página pide las filas que vienen
+después (o antes) de la última vista según el orden (campo, id), así que
+la página N cuesta lo mismo que la primera si el campo está indexado.
+
+El cursor es un texto opaco (base64 de [valor, id]) que va en la URL como
+?despues=<cursor> o ?antes=<cursor>, y sirve igual para una API JSON.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+POR_PAGINA = 25
+
+
+@dataclass
+class PaginaKeyset:
+    objetos: list = field(default_factory=list)
+    siguiente: str = None  # cursor para ?despues=
+    anterior: str = None   # cursor para ?antes=
+
+    @property
+    def tiene_siguiente(self):
+        return self.siguiente is not None
+
+    @property
+    def tiene_anterior(self):
+        return self.anterior is not None
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+
+def _codificar(valor, pk):
+    # isoformat() y no DjangoJSONEncoder: este recorta los microsegundos y el
+    # cursor ya no coincidiría exactamente con el valor guardado.
+    if hasattr(valor, "isoformat"):
+        valor = valor.isoformat()
+    texto = json.dumps([valor, pk])
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii")
+
+
+def _decodificar(cursor, campo_modelo):
+    """Devuelve (valor, pk) o None si el cursor no es válido."""
+    try:
+        valor, pk = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return campo_modelo.to_python(valor), int(pk)
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def paginar(queryset, orden, params, por_pagina=POR_PAGINA):
+    """
+    Pagina `queryset` por (orden, id). `orden` es un nombre de campo con "-"
+    opcional para orden descendente (p. ej. "-fecha"). `params` es
+    request.GET (o cualquier dict con "despues"/"antes").
+    """
+    descendente = orden.startswith("-")
+    nombre = orden.lstrip("-")
+    campo_modelo = queryset.model._meta.get_field(nombre)
+
+    despues = params.get("despues")
+    crudo = despues or params.get("antes")
+    cursor = _decodificar(crudo, campo_modelo) if crudo else None
+    hacia_atras = cursor is not None and not despues
+
+    # Al retroceder se recorre el orden inverso y luego se da vuelta la página
+    invertir = descendente != hacia_atras
+    signo = "-" if invertir else ""
+    qs = queryset.order_by(f"{signo}{nombre}", f"{signo}id")
+
+    if cursor is not None:
+        valor, pk = cursor
+        op = "lt" if invertir else "gt"
+        qs = qs.filter(Q(**{f"{nombre}__{op}": valor}) | Q(**{nombre: valor, f"id__{op}": pk}))
+
+    filas = list(qs[:por_pagina + 1])
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+    if hacia_atras:
+        filas.reverse()
+
+    pagina = PaginaKeyset(objetos=filas)
+    if filas:
+        primero, ultimo = filas[0], filas[-1]
+        if hacia_atras:
+            pagina.anterior = _codificar(getattr(primero, nombre), primero.pk) if hay_mas else None
+            pagina.siguiente = _codificar(getattr(ultimo, nombre), ultimo.pk)
+        else:
+            pagina.siguiente = _codificar(getattr(ultimo, nombre), ultimo.pk) if hay_mas else None
+            pagina.anterior = _codificar(getattr(primero, nombre), primero.pk) if cursor else None
+    return pagina
@@ -0,0 +1,176 @@
+# ventas/pronostico.py
+"""
+Pronóstico de demanda por plato y lista de compras para el día siguiente.
+
+1. Una sola consulta agrupada trae las porciones vendidas por plato y día
+   (pedidos cerrados de la sucursal, hasta ayer: el día en curso está
+   incompleto) y se vuelcan a una matriz
+   platos × días con NumPy.
+2. Índice por día de la semana: promedio móvil de las últimas SEMANAS
+   semanas de cada día de la semana, dividido por el promedio general.
+3. La serie sin estacionalidad se suaviza exponencialmente (alfa = ALFA),
+   en forma cerrada: un producto matriz × vector de pesos, sin bucles.
+4. Pronóstico = nivel suavizado × índice del día de la semana de mañana.
+5. Compras = pronóstico (porciones) × recetas (ingrediente por porción).
+
+NumPy se importa dentro de las funciones (igual que pandas en la
+importación de la carta) para no cargarlo en cada worker.
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DetallePedido, Plato, Receta
+
+HISTORIA_DIAS = 730
+SEMANAS = 8
+ALFA = 0.3
+MARGEN = 0.10  # colchón sobre lo pronosticado al comprar
+
+
+def matriz_ventas(sucursal, desde, hasta):
+    """
+    Porciones vendidas en [desde, hasta] como (plato_ids, matriz) con
+    matriz[i, d] = porciones del plato i el día desde + d.
+    """
+    import numpy as np
+
+    # Rango de fechas-hora (no __date) para usar el índice (sucursal, estado, creado)
+    inicio = timezone.make_aware(datetime.combine(desde, time.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+    filas = list(
+        DetallePedido.objects
+        .filter(pedido__sucursal=sucursal, pedido__estado="cerrado",
+                pedido__creado__gte=inicio, pedido__creado__lt=fin)
+        .annotate(dia=TruncDate("pedido__creado"))
+        .values("plato_id", "dia")
+        .annotate(porciones=Sum("cantidad"))
+        .order_by()
+        .values_list("plato_id", "dia", "porciones")
+    )
+    dias = (hasta - desde).days + 1
+    if not filas:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, dias))
+
+    plato_col, dia_col, porciones = zip(*filas)
+    plato_ids, fila_idx = np.unique(np.array(plato_col, dtype=np.int64), return_inverse=True)
+    dia_idx = np.array([(d - desde).days for d in dia_col], dtype=np.int64)
+
+    matriz = np.zeros((len(plato_ids), dias))
+    np.add.at(matriz, (fila_idx, dia_idx), np.array(porciones, dtype=float))
+    return plato_ids, matriz
+
+
+def indice_semanal(matriz, dias_semana, semanas=SEMANAS):
+    """
+    indice[i, w]: promedio de las últimas `semanas` semanas del plato i en el
+    día de la semana w, relativo a su promedio de esas semanas (1 = normal).
+    """
+    import numpy as np
+
+    ventana = min(semanas * 7, matriz.shape[1])
+    reciente = matriz[:, -ventana:]
+    dias = dias_semana[-ventana:]
+
+    por_dia = np.stack(
+        [reciente[:, dias == w].mean(axis=1) if (dias == w).any() else np.zeros(len(matriz))
+         for w in range(7)],
+        axis=1,
+    )
+    promedio = reciente.mean(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        indice = np.where(promedio > 0, por_dia / promedio, 1.0)
+    return indice
+
+
+def suavizado_exponencial(serie, alfa=ALFA):
+    """
+    Nivel final del suavizado exponencial simple de cada fila:
+    alfa·Σ (1-alfa)^k·x[t-k] + (1-alfa)^n·x[0], como un solo producto matricial.
+    """
+    import numpy as np
+
+    n = serie.shape[1]
+    if n == 0:
+        return np.zeros(serie.shape[0])
+    pesos = alfa * (1 - alfa) ** np.arange(n - 1, -1, -1)
+    pesos[0] += (1 - alfa) ** n
+    return serie @ pesos
+
+
+def pronosticar(sucursal, fecha=None, historia_dias=HISTORIA_DIAS):
+    """
+    Pronóstico para `fecha` (por defecto mañana): porciones por plato e
+    ingredientes a comprar. Se guarda en caché por sucursal y día.
+    """
+    fecha = fecha or timezone.localdate() + timedelta(days=1)
+    clave = f"pronostico:{sucursal.pk}:{fecha.isoformat()}"
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = _calcular(sucursal, fecha, historia_dias)
+        cache.set(clave, resultado, 60 * 60 * 24)
+    return resultado
+
+
+def invalidar(sucursal, fecha=None):
+    fecha = fecha or timezone.localdate() + timedelta(days=1)
+    cache.delete(f"pronostico:{sucursal.pk}:{fecha.isoformat()}")
+
+
+def _calcular(sucursal, fecha, historia_dias):
+    import numpy as np
+
+    # Solo días completos: hoy sigue vendiendo y su columna saldría baja
+    hasta = min(fecha, timezone.localdate()) - timedelta(days=1)
+    desde = hasta - timedelta(days=historia_dias - 1)
+    plato_ids, matriz = matriz_ventas(sucursal, desde, hasta)
+    if not len(plato_ids):
+        return {"fecha": fecha, "platos": [], "compras": []}
+
+    dias_semana = (np.arange(matriz.shape[1]) + desde.weekday()) % 7
+    indice = indice_semanal(matriz, dias_semana)
+
+    # Sin estacionalidad → suavizado → se vuelve a aplicar el índice de mañana
+    factores = indice[:, dias_semana]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        desestacionalizada = np.where(factores > 0, matriz / factores, matriz)
+    nivel = suavizado_exponencial(desestacionalizada)
+    porciones = np.clip(nivel * indice[:, fecha.weekday()], 0, None)
+
+    # Recetas como matriz platos × ingredientes
+    recetas = list(
+        Receta.objects.filter(plato_id__in=plato_ids.tolist())
+        .values_list("plato_id", "ingrediente_id", "ingrediente__nombre",
+                     "ingrediente__unidad", "cantidad")
+    )
+    compras = []
+    if recetas:
+        ingredientes = {}
+        for _, ing_id, nombre, unidad, _ in recetas:
+            ingredientes.setdefault(ing_id, (nombre, unidad))
+        ing_ids = list(ingredientes)
+        col = {ing_id: j for j, ing_id in enumerate(ing_ids)}
+        fila = {plato_id: i for i, plato_id in enumerate(plato_ids.tolist())}
+
+        receta = np.zeros((len(plato_ids), len(ing_ids)))
+        for plato_id, ing_id, _, _, cantidad in recetas:
+            receta[fila[plato_id], col[ing_id]] = float(cantidad)
+
+        necesario = porciones @ receta * (1 + MARGEN)
+        compras = sorted(
+            ({"ingrediente": ingredientes[ing_id][0], "unidad": ingredientes[ing_id][1],
+              "cantidad": round(float(necesario[j]), 2)}
+             for j, ing_id in enumerate(ing_ids) if necesario[j] > 0),
+            key=lambda c: c["ingrediente"],
+        )
+
+    nombres = dict(Plato.objects.filter(id__in=plato_ids.tolist()).values_list("id", "nombre"))
+    platos = sorted(
+        ({"plato": nombres.get(pid, f"#{pid}"), "porciones": round(float(p), 1)}
+         for pid, p in zip(plato_ids.tolist(), porciones) if p >= 0.05),
+        key=lambda p: -p["porciones"],
+    )
+    return {"fecha": fecha, "platos": platos, "compras": compras}
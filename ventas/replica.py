@@ -0,0 +1,73 @@
+# ventas/replica.py
+"""
+Lecturas de reportes en la réplica.
+
+Las vistas de reportes (@lectura_reportes) leen los modelos de ventas desde
+el alias ALIAS ("reporting") si está configurado (DATABASE_URL_REPORTING).
+Si no, o si hace poco hubo una escritura en la misma sesión, leen del
+primario para que el usuario vea lo que acaba de guardar.
+
+ReplicaRouter detecta las escrituras (todo pasa por db_for_write) y
+LecturaReplicaMiddleware recuerda en la sesión hasta cuándo leer del primario.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+ALIAS = "reporting"
+SESSION_KEY = "leer_primario_hasta"
+
+_en_reportes = ContextVar("en_reportes", default=False)
+_forzar_primario = ContextVar("forzar_primario", default=False)
+_hubo_escritura = ContextVar("hubo_escritura", default=False)
+
+
+def replica_configurada():
+    return ALIAS in settings.DATABASES
+
+
+def alias_lectura():
+    """'reporting' si corresponde leer de la réplica en este momento, o None."""
+    if not _en_reportes.get() or _forzar_primario.get() or _hubo_escritura.get():
+        return None
+    return ALIAS if replica_configurada() else None
+
+
+@contextmanager
+def usar_reportes():
+    token = _en_reportes.set(True)
+    try:
+        yield
+    finally:
+        _en_reportes.reset(token)
+
+
+def lectura_reportes(vista):
+    """Decorador para vistas de solo lectura que pueden ir a la réplica."""
+    @wraps(vista)
+    def envuelta(*args, **kwargs):
+        with usar_reportes():
+            return vista(*args, **kwargs)
+    return envuelta
+
+
+# ================= LEER-LO-QUE-ESCRIBÍ ==================
+def marcar_escritura():
+    _hubo_escritura.set(True)
+
+
+def hubo_escritura():
+    return _hubo_escritura.get()
+
+
+def iniciar_request(forzar_primario):
+    """Estado limpio por request; devuelve tokens para terminar_request()."""
+    return _forzar_primario.set(forzar_primario), _hubo_escritura.set(False)
+
+
+def terminar_request(tokens):
+    token_primario, token_escritura = tokens
+    _forzar_primario.reset(token_primario)
+    _hubo_escritura.reset(token_escritura)
@@ -0,0 +1,243 @@
+# ventas/respaldo.py
+"""
+Respaldo y restauración de ventas en JSONL comprimido (gzip).
+
+El archivo tiene una línea de cabecera y luego una línea por fila:
+
+    {"formato": 2, "tipo": "completo", "campos": {...}, "desde": {...}, ...}
+    ["plato", [3, "Ceviche", "25.00", "Fríos", true]]
+
+Las filas se leen con iterator() por bloques y se escriben a medida que
+llegan, así que la memoria no crece con el historial. Los valores van como
+texto ISO / decimal en texto, de modo que el archivo sirve igual para
+SQLite y PostgreSQL.
+
+Modo incremental: el catálogo (sucursales, estaciones, platos, recetas, mesas) es
+chico y va siempre completo. Pedidos y cajas tienen `actualizado` (auto_now;
+los cambios de un detalle también tocan su pedido), así que cada respaldo
+guarda como marca de agua la hora en que empezó y el incremental exporta lo
+modificado desde esa marca menos MARGEN (por transacciones que estaban en
+curso al tomarla). Un pedido que queda abierto días no arrastra a los
+demás. Los detalles van por pedido: se exportan (y al restaurar se
+reemplazan) todos los de los pedidos exportados, así también se reflejan
+los platos quitados. Los pedidos o cajas borrados solo los recoge un
+respaldo completo.
+
+Un respaldo completo se restaura en una base recién migrada (solo con la
+sucursal 'principal' que crea la migración); los incrementales, sobre esa
+misma base. Las filas se identifican por id: otra clave única repetida con
+distinto id (número de mesa, código de sucursal...) no se puede fusionar.
+"""
+import gzip
+import json
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import (
+    Sucursal, Estacion, CategoriaEstacion, Plato, Ingrediente, Receta,
+    Mesa, Pedido, DetallePedido, Caja,
+)
+
+FORMATO = 2
+BLOQUE = 2000
+MARGEN = timedelta(minutes=5)
+
+# Orden de dependencias (claves foráneas). Clave → modelo.
+MODELOS = {
+    "sucursal": Sucursal,
+    "estacion": Estacion,
+    "categoriaestacion": CategoriaEstacion,
+    "plato": Plato,
+    "plato_no_disponible": Plato.no_disponible_en.through,
+    "ingrediente": Ingrediente,
+    "receta": Receta,
+    "mesa": Mesa,
+    "pedido": Pedido,
+    "detallepedido": DetallePedido,
+    "caja": Caja,
+}
+
+# Modelos que en modo incremental se exportan desde una marca de agua
+INCREMENTALES = ("pedido", "detallepedido", "caja")
+
+# Tablas que se reemplazan completas al restaurar, para que también se
+# reflejen las filas borradas (un plato que vuelve a estar disponible)
+REEMPLAZO_TOTAL = ("plato_no_disponible",)
+
+
+def _campos(modelo):
+    return list(modelo._meta.concrete_fields)
+
+
+def _serializar(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+# ================= MARCAS DE AGUA ==================
+def calcular_marcas():
+    """Hora de inicio del respaldo: el próximo incremental exporta desde ahí."""
+    return {"actualizado": timezone.now().isoformat()}
+
+
+def _queryset(clave, db, desde):
+    qs = MODELOS[clave].objects.using(db)
+    if desde is None or clave not in INCREMENTALES:
+        return qs
+    corte = parse_datetime(desde["actualizado"]) - MARGEN
+    if clave == "detallepedido":
+        return qs.filter(pedido__actualizado__gte=corte)
+    return qs.filter(actualizado__gte=corte)
+
+
+# ================= RESPALDO ==================
+def respaldar(ruta, db="default", desde=None):
+    """
+    Escribe el respaldo en `ruta`. Con `desde` (marcas de un respaldo
+    anterior) es incremental. Devuelve (marcas nuevas, filas por modelo).
+    """
+    # Las marcas se calculan antes de leer: lo que cambie durante el
+    # respaldo queda por encima de ellas y entra en el próximo incremental.
+    marcas = calcular_marcas()
+    cabecera = {
+        "formato": FORMATO,
+        "tipo": "incremental" if desde else "completo",
+        "creado": timezone.now().isoformat(),
+        "desde": desde,
+        "marcas": marcas,
+        "campos": {clave: [f.attname for f in _campos(m)] for clave, m in MODELOS.items()},
+    }
+
+    conteo = {}
+    with gzip.open(ruta, "wt", encoding="utf-8", compresslevel=6) as salida:
+        salida.write(json.dumps(cabecera, ensure_ascii=False) + "\n")
+        for clave in MODELOS:
+            columnas = cabecera["campos"][clave]
+            filas = _queryset(clave, db, desde).order_by("pk").values_list(*columnas)
+            n = 0
+            for fila in filas.iterator(chunk_size=BLOQUE):
+                salida.write(json.dumps([clave, [_serializar(v) for v in fila]], ensure_ascii=False))
+                salida.write("\n")
+                n += 1
+            conteo[clave] = n
+    return marcas, conteo
+
+
+# ================= RESTAURACIÓN ==================
+@contextmanager
+def _sin_auto_now():
+    """bulk_create llama a pre_save: sin esto, 'creado' tomaría la hora actual."""
+    campos = [
+        f for m in MODELOS.values() for f in _campos(m)
+        if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)
+    ]
+    originales = [(f, f.auto_now, f.auto_now_add) for f in campos]
+    for f in campos:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in originales:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _ocupados(db):
+    """Modelos con filas en `db`, sin contar las sucursales ('principal' la crea migrate)."""
+    return [
+        clave for clave, modelo in MODELOS.items()
+        if clave != "sucursal" and modelo.objects.using(db).exists()
+    ]
+
+
+def _guardar(modelo, objetos, db):
+    if not objetos:
+        return
+    actualizables = [f.name for f in _campos(modelo) if not f.primary_key]
+    modelo.objects.using(db).bulk_create(
+        objetos,
+        batch_size=BLOQUE,
+        update_conflicts=bool(actualizables),
+        unique_fields=["pk"] if actualizables else None,
+        update_fields=actualizables or None,
+    )
+
+
+def restaurar(ruta, db="default"):
+    """
+    Carga un respaldo (completo o incremental) con bulk inserts por bloques.
+    Las filas existentes con el mismo id se actualizan. Un respaldo completo
+    exige una base vacía (ValueError si no). Devuelve las filas cargadas por
+    modelo.
+    """
+    conteo = {}
+    with gzip.open(ruta, "rt", encoding="utf-8") as entrada, \
+            transaction.atomic(using=db), _sin_auto_now():
+        cabecera = json.loads(entrada.readline())
+        if cabecera.get("formato") != FORMATO:
+            raise ValueError(f"Formato de respaldo no soportado: {cabecera.get('formato')}")
+        desde = cabecera.get("desde")
+        if cabecera.get("tipo") == "completo":
+            ocupados = _ocupados(db)
+            if ocupados:
+                raise ValueError(
+                    "un respaldo completo se restaura en una base vacía; "
+                    f"'{db}' ya tiene datos en: {', '.join(ocupados)}"
+                )
+
+        # Columnas del archivo → campos del modelo actual
+        campos = {}
+        for clave, columnas in cabecera["campos"].items():
+            por_attname = {f.attname: f for f in _campos(MODELOS[clave])}
+            campos[clave] = [(col, por_attname[col]) for col in columnas]
+
+        for clave in REEMPLAZO_TOTAL:
+            MODELOS[clave].objects.using(db).all().delete()
+
+        pedidos = []  # ids de los pedidos del incremental
+
+        def cerrar_bloque(clave, pendientes):
+            _guardar(MODELOS[clave], pendientes, db)
+            if desde and clave == "pedido":
+                # Los detalles de los pedidos exportados se reemplazan completos
+                for i in range(0, len(pedidos), BLOQUE):
+                    DetallePedido.objects.using(db)\
+                        .filter(pedido_id__in=pedidos[i:i + BLOQUE]).delete()
+
+        actual, pendientes = None, []
+        for linea in entrada:
+            clave, valores = json.loads(linea)
+            if clave != actual:
+                if actual:
+                    cerrar_bloque(actual, pendientes)
+                actual, pendientes = clave, []
+            modelo = MODELOS[clave]
+            objeto = modelo(**{
+                col: campo.to_python(v) for (col, campo), v in zip(campos[clave], valores)
+            })
+            pendientes.append(objeto)
+            if desde and clave == "pedido":
+                pedidos.append(objeto.pk)
+            conteo[clave] = conteo.get(clave, 0) + 1
+            if len(pendientes) >= BLOQUE:
+                _guardar(modelo, pendientes, db)
+                pendientes = []
+        if actual:
+            cerrar_bloque(actual, pendientes)
+
+        # Con ids explícitos hay que mover las secuencias (PostgreSQL)
+        connection = connections[db]
+        sql = connection.ops.sequence_reset_sql(no_style(), list(MODELOS.values()))
+        if sql:
+            with connection.cursor() as cursor:
+                for sentencia in sql:
+                    cursor.execute(sentencia)
+    return conteo
@@ -0,0 +1,62 @@
+from . import replica, sucursales
+
+
+class SucursalRouter:
+    """
+    Envía las ventas (mesas, pedidos, detalles y cajas) a la base de datos
+    propia de la sucursal en curso (Sucursal.base_datos). Sin sucursal
+    fijada, o si la sucursal no tiene base propia, no opina y se usa 'default'.
+
+    El catálogo (sucursales, platos, estaciones, recetas) vive siempre en
+    'default', también con una sucursal fijada (p. ej. al editar desde el
+    admin). Cada base de sucursal tiene una copia para las claves foráneas
+    y los joins, que se actualiza con `manage.py sincronizar_catalogo`.
+    """
+
+    app_label = "ventas"
+    por_sucursal = {"mesa", "pedido", "detallepedido", "caja"}
+
+    def _alias(self, model):
+        if model._meta.app_label != self.app_label:
+            return None
+        alias = sucursales.alias_actual()
+        if alias is None:
+            return None
+        return alias if model._meta.model_name in self.por_sucursal else "default"
+
+    def db_for_read(self, model, **hints):
+        return self._alias(model)
+
+    def db_for_write(self, model, **hints):
+        return self._alias(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # request.sucursal se lee de 'default' pero existe (mismo pk) en la
+        # base de la sucursal, así que se puede asignar a objetos de allí.
+        if obj1._meta.app_label == obj2._meta.app_label == self.app_label:
+            return True
+        return None
+
+
+class ReplicaRouter:
+    """
+    Lecturas de vistas de reportes a la réplica (alias 'reporting'); todo lo
+    demás al primario. Va después de SucursalRouter: una sucursal con base
+    propia no usa la réplica.
+
+    Toda escritura de ventas pasa por db_for_write (save, update, delete,
+    bulk_create, select_for_update), así que aquí se marca para que el resto
+    del request y de la sesión lea del primario.
+    """
+
+    app_label = "ventas"
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            return replica.alias_lectura()
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            replica.marcar_escritura()
+        return None
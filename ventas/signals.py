@@ -0,0 +1,22 @@
+# ventas/signals.py
+"""Republica la carta del autoservicio cuando cambian los platos o su disponibilidad."""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import autoservicio
+from .models import Plato
+
+
+# La carta se arma desde 'default': las copias que sincronizar_catalogo
+# guarda en las bases de sucursal no la cambian.
+@receiver(post_save, sender=Plato)
+@receiver(post_delete, sender=Plato)
+def plato_cambiado(sender, using, **kwargs):
+    if using == "default":
+        autoservicio.programar_republicacion(using)
+
+
+@receiver(m2m_changed, sender=Plato.no_disponible_en.through)
+def disponibilidad_cambiada(sender, action, using, **kwargs):
+    if using == "default" and action in ("post_add", "post_remove", "post_clear"):
+        autoservicio.programar_republicacion(using)
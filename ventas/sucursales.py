@@ -0,0 +1,92 @@
+# ventas/sucursales.py
+"""
+Sucursal actual del request.
+
+SucursalMiddleware fija la sucursal al inicio de cada request y las vistas
+la leen de request.sucursal. Además queda en un ContextVar para que
+SucursalRouter envíe las consultas a la base de datos propia de la
+sucursal cuando tiene una (Sucursal.base_datos).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import Sucursal, sucursal_por_defecto
+
+_sucursal_actual = ContextVar("sucursal_actual", default=None)
+
+SESSION_KEY = "sucursal_id"
+
+
+def sucursal_actual():
+    """Sucursal fijada para el request/tarea en curso, o None."""
+    return _sucursal_actual.get()
+
+
+def alias_actual():
+    """Alias de base de datos de la sucursal en curso, o None si usa 'default'."""
+    sucursal = _sucursal_actual.get()
+    if sucursal is None:
+        return None
+    return sucursal.base_datos or None
+
+
+def fijar(sucursal):
+    """Fija la sucursal en curso; devuelve el token para restaurar con liberar()."""
+    if sucursal is not None and sucursal.base_datos and sucursal.base_datos not in settings.DATABASES:
+        raise ImproperlyConfigured(
+            f"La sucursal '{sucursal.codigo}' usa la base de datos "
+            f"'{sucursal.base_datos}', que no está en settings.DATABASES."
+        )
+    return _sucursal_actual.set(sucursal)
+
+
+def liberar(token):
+    _sucursal_actual.reset(token)
+
+
+@contextmanager
+def usar_sucursal(sucursal):
+    """Ejecuta un bloque (comando, tarea) dentro de una sucursal."""
+    token = fijar(sucursal)
+    try:
+        yield sucursal
+    finally:
+        liberar(token)
+
+
+_principal_id = None
+
+
+def id_principal():
+    """Id de la sucursal por defecto, resuelto una vez por proceso."""
+    global _principal_id
+    if _principal_id is None:
+        _principal_id = sucursal_por_defecto()
+    return _principal_id
+
+
+def resolver_sucursal(request):
+    """
+    Sucursal del request, en este orden: ?sucursal=<codigo> (queda guardada
+    en la sesión), la guardada en la sesión, o la sucursal por defecto.
+    Las sucursales siempre se leen de la base 'default'.
+    """
+    sucursales = Sucursal.objects.using("default").filter(activa=True)
+
+    codigo = request.GET.get("sucursal")
+    if codigo:
+        sucursal = sucursales.filter(codigo=codigo).first()
+        if sucursal:
+            request.session[SESSION_KEY] = sucursal.pk
+            return sucursal
+
+    sucursal_id = request.session.get(SESSION_KEY)
+    if sucursal_id:
+        sucursal = sucursales.filter(pk=sucursal_id).first()
+        if sucursal:
+            return sucursal
+
+    return Sucursal.objects.using("default").get(pk=id_principal())
@@ -1,3 +1,227 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import datetime, time, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import autoservicio, cocina, pronostico, replica, respaldo, sucursales
+from .models import (
+    CategoriaEstacion, DetallePedido, Estacion, Ingrediente, Mesa, Pedido, Plato,
+    Receta, Sucursal,
+)
+
+
+@skipUnless(
+    replica.replica_configurada(),
+    "Requiere DATABASE_URL_REPORTING, p. ej.: "
+    "DATABASE_URL_REPORTING=sqlite:////tmp/reporting.sqlite3 python manage.py test ventas",
+)
+class LecturaReplicaTests(TransactionTestCase):
+    """
+    Reportes a la réplica y leer-lo-que-escribí. En tests 'reporting' es
+    espejo de 'default' (TEST MIRROR): misma base, otra conexión, así que se
+    puede ver qué alias atendió cada consulta. TransactionTestCase: con
+    SQLite la réplica no puede leer dentro de la transacción de TestCase.
+    """
+
+    databases = "__all__"
+
+    def setUp(self):
+        sucursales._principal_id = None  # la base de tests empieza vacía
+
+    def consultas(self, url, alias="reporting"):
+        with CaptureQueriesContext(connections[alias]) as capturadas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return [q["sql"] for q in capturadas]
+
+    def test_reportes_leen_de_la_replica(self):
+        for url in ("/ventas/dashboard/", "/ventas/cajas/"):
+            with self.subTest(url=url):
+                self.assertTrue(any("ventas_caja" in sql for sql in self.consultas(url)))
+
+    def test_despues_de_escribir_la_sesion_lee_del_primario(self):
+        ahora = 1_000_000.0
+        with mock.patch("ventas.middleware.time.time", return_value=ahora):
+            respuesta = self.client.post("/ventas/caja/abrir/", {"monto_inicial": "100"})
+            self.assertEqual(respuesta.status_code, 302)
+
+            self.assertEqual(self.consultas("/ventas/cajas/"), [])
+            self.assertTrue(any(
+                "ventas_caja" in sql for sql in self.consultas("/ventas/cajas/", alias="default")
+            ))
+
+        # Pasado REPLICA_PRIMARIO_SEGUNDOS vuelve a la réplica
+        despues = ahora + settings.REPLICA_PRIMARIO_SEGUNDOS + 1
+        with mock.patch("ventas.middleware.time.time", return_value=despues):
+            self.assertTrue(any("ventas_caja" in sql for sql in self.consultas("/ventas/cajas/")))
+
+
+class LatenciasCocinaTests(TestCase):
+    """Reporte de tiempos de cocina, con y sin estaciones configuradas."""
+
+    def setUp(self):
+        sucursales._principal_id = None
+        self.sucursal = Sucursal.objects.get(pk=sucursales.id_principal())
+        self.mesa = Mesa.objects.create(sucursal=self.sucursal, numero=1)
+        self.plato = Plato.objects.create(nombre="Ceviche", precio=25, categoria="Fríos")
+        self.desde = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        self.hasta = self.desde + timedelta(days=1)
+
+    def servir(self, minutos):
+        pedido = Pedido.objects.create(sucursal=self.sucursal, mesa=self.mesa)
+        detalle = DetallePedido.objects.create(pedido=pedido, plato=self.plato, cantidad=1)
+        creado = self.desde + timedelta(hours=12)
+        DetallePedido.objects.filter(pk=detalle.pk).update(
+            creado=creado, servido_en=creado + timedelta(minutes=minutos), estado="servido",
+        )
+
+    def test_dia_sin_lineas_sin_estaciones(self):
+        self.assertEqual(cocina.latencias_por_estacion(self.sucursal, self.desde, self.hasta), [])
+        # La réplica tiene sus propios tests; aquí se lee del primario
+        with mock.patch("ventas.replica.alias_lectura", return_value=None):
+            respuesta = self.client.get("/ventas/cocina/reporte/?fecha=2020-01-01")
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context["latencias"], [])
+
+    def test_dia_sin_lineas_con_estaciones(self):
+        estacion = Estacion.objects.create(nombre="Fríos", orden=1)
+        CategoriaEstacion.objects.create(categoria="Fríos", estacion=estacion)
+        self.assertEqual(cocina.latencias_por_estacion(self.sucursal, self.desde, self.hasta), [])
+
+    def test_sin_estaciones_todo_va_a_la_de_por_defecto(self):
+        for minutos in (5, 10, 30):
+            self.servir(minutos)
+        [fila] = cocina.latencias_por_estacion(self.sucursal, self.desde, self.hasta)
+        self.assertEqual(fila["estacion"], cocina.ESTACION_POR_DEFECTO)
+        self.assertEqual(fila["lineas"], 3)
+        self.assertEqual(fila["p50_min"], 10)
+        self.assertEqual(fila["p95_min"], 30)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class PronosticoTests(TestCase):
+    """Pronóstico de mañana con un historial plano."""
+
+    DIARIO = 6
+
+    def setUp(self):
+        self.sucursal = Sucursal.objects.get(pk=sucursales.id_principal())
+        self.mesa = Mesa.objects.create(sucursal=self.sucursal, numero=1)
+        self.plato = Plato.objects.create(nombre="Ceviche", precio=25, categoria="Fríos")
+        limon = Ingrediente.objects.create(nombre="Limón", unidad="kg")
+        Receta.objects.create(plato=self.plato, ingrediente=limon, cantidad="0.100")
+
+    def vender(self, dia, cantidad):
+        pedido = Pedido.objects.create(sucursal=self.sucursal, mesa=self.mesa, estado="cerrado")
+        DetallePedido.objects.create(pedido=pedido, plato=self.plato, cantidad=cantidad)
+        Pedido.objects.filter(pk=pedido.pk).update(
+            creado=timezone.make_aware(datetime.combine(dia, time(13)))
+        )
+
+    def test_historial_plano_da_el_promedio_diario(self):
+        hoy = timezone.localdate()
+        for n in range(1, 120):
+            self.vender(hoy - timedelta(days=n), self.DIARIO)
+        self.vender(hoy, 1)  # el día en curso todavía no terminó
+
+        resultado = pronostico.pronosticar(self.sucursal)
+
+        self.assertEqual(resultado["fecha"], hoy + timedelta(days=1))
+        [plato] = resultado["platos"]
+        self.assertAlmostEqual(plato["porciones"], self.DIARIO, delta=0.1)
+        [compra] = resultado["compras"]
+        self.assertAlmostEqual(
+            compra["cantidad"], self.DIARIO * 0.1 * (1 + pronostico.MARGEN), delta=0.02
+        )
+
+
+class CartaAutoservicioTests(TransactionTestCase):
+    """
+    La carta QR se republica al confirmar cambios de platos y rechaza pedidos
+    hechos con una carta vieja. TransactionTestCase: la republicación corre
+    en on_commit, con commits reales.
+    """
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=media.name))
+        sucursales._principal_id = None
+        self.sucursal = Sucursal.objects.get(pk=sucursales.id_principal())
+        self.mesa = Mesa.objects.create(sucursal=self.sucursal, numero=1)
+        self.plato = Plato.objects.create(nombre="Ceviche", precio=25, categoria="Fríos")
+
+    def pedir(self, version):
+        return self.client.post(
+            "/ventas/autoservicio/pedido/",
+            json.dumps({
+                "mesa": autoservicio.token_mesa(self.mesa),
+                "version": version,
+                "items": [{"plato": self.plato.pk, "cantidad": 1}],
+            }),
+            content_type="application/json",
+        )
+
+    def test_cambios_en_una_transaccion_republican_una_vez(self):
+        anterior = autoservicio.version_publicada(self.sucursal)
+        self.assertIsNotNone(anterior)
+        with mock.patch("ventas.autoservicio.publicar_carta", wraps=autoservicio.publicar_carta) as publicar:
+            with transaction.atomic():
+                self.plato.precio = 30
+                self.plato.save()
+                self.plato.no_disponible_en.add(self.sucursal)
+        self.assertEqual(publicar.call_count, 1)
+        self.assertNotEqual(autoservicio.version_publicada(self.sucursal), anterior)
+
+    def test_pedido_con_carta_vieja(self):
+        anterior = autoservicio.version_publicada(self.sucursal)
+        self.plato.precio = 30
+        self.plato.save()
+        self.assertEqual(self.pedir(anterior).status_code, 409)
+        self.assertEqual(self.pedir(autoservicio.version_publicada(self.sucursal)).status_code, 200)
+
+
+class RespaldoIncrementalTests(TestCase):
+    """El incremental exporta lo modificado desde la marca, no desde el id más bajo abierto."""
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.ruta = f"{carpeta.name}/incremental.jsonl.gz"
+        self.sucursal = Sucursal.objects.get(pk=sucursales.id_principal())
+        self.mesa = Mesa.objects.create(sucursal=self.sucursal, numero=1)
+        self.plato = Plato.objects.create(nombre="Ceviche", precio=25, categoria="Fríos")
+
+    def pedido(self, actualizado):
+        pedido = Pedido.objects.create(sucursal=self.sucursal, mesa=self.mesa)
+        DetallePedido.objects.create(pedido=pedido, plato=self.plato, cantidad=1)
+        Pedido.objects.filter(pk=pedido.pk).update(actualizado=actualizado)
+        return pedido
+
+    def test_solo_lo_modificado_desde_la_marca(self):
+        ahora = timezone.now()
+        olvidado = self.pedido(ahora - timedelta(days=3))  # abierto hace días
+        cerrado = self.pedido(ahora - timedelta(days=2))
+        reciente = self.pedido(ahora)
+        desde = {"actualizado": (ahora - timedelta(hours=1)).isoformat()}
+
+        _, conteo = respaldo.respaldar(self.ruta, desde=desde)
+        self.assertEqual(conteo["pedido"], 1)
+        self.assertEqual(conteo["detallepedido"], 1)
+
+        # Un cambio en un detalle también marca su pedido
+        DetallePedido.objects.filter(pedido=cerrado).get().save()
+        self.assertGreater(Pedido.objects.get(pk=cerrado.pk).actualizado, ahora)
+        self.assertEqual(Pedido.objects.get(pk=olvidado.pk).estado, "abierto")
+
+        # Al restaurar se reemplazan los detalles de los pedidos exportados
+        DetallePedido.objects.create(pedido=reciente, plato=self.plato, cantidad=2)
+        respaldo.restaurar(self.ruta)
+        self.assertEqual(DetallePedido.objects.filter(pedido=reciente).count(), 1)
+        self.assertEqual(DetallePedido.objects.filter(pedido=olvidado).count(), 1)
@@ -29,4 +29,17 @@ urlpatterns = [
     path("cajas/", views.lista_cajas, name="lista_cajas"),
 
     path('mesas/liberar/<int:pk>/', views.liberar_mesa, name='liberar_mesa'),
+
+    # ========== COCINA ==========
+    path("cocina/", views.cola_cocina, name="cola_cocina"),
+    path("cocina/detalle/<int:detalle_id>/iniciar/", views.iniciar_detalle, name="iniciar_detalle"),
+    path("cocina/detalle/<int:detalle_id>/servir/", views.servir_detalle, name="servir_detalle"),
+    path("cocina/reporte/", views.reporte_cocina, name="reporte_cocina"),
+
+    # ========== COMPRAS ==========
+    path("compras/", views.lista_compras, name="lista_compras"),
+
+    # ========== AUTOSERVICIO (QR) ==========
+    path("mesa/<int:mesa_id>/qr/", views.qr_mesa, name="qr_mesa"),
+    path("autoservicio/pedido/", views.autoservicio_pedido, name="autoservicio_pedido"),
 ]
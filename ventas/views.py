@@ -1,24 +1,32 @@
 # ventas/views.py
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Sum, F
+from django.db.models import Sum, F, Case, When
 from django.contrib import messages
+from django.core import signing
 from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.utils import timezone
-from datetime import timedelta
-import pandas as pd
+from datetime import datetime, time, timedelta
 import json
 from decimal import Decimal
 from collections import defaultdict
 
-from .models import Mesa, Plato, Pedido, DetallePedido, Caja
+from .models import Mesa, Plato, Pedido, DetallePedido, Caja, Sucursal
+from .paginacion import paginar
+from .replica import lectura_reportes
+from .sucursales import usar_sucursal
+from . import autoservicio, cocina, pronostico
 
 # ================= INICIO ==================
 def inicio(request):
     """Página de inicio: muestra resumen de mesas y pedidos activos."""
-    total_mesas = Mesa.objects.count()
-    mesas_ocupadas = Pedido.objects.filter(estado="abierto").values_list("mesa_id", flat=True).distinct().count()
+    total_mesas = Mesa.objects.filter(sucursal=request.sucursal).count()
+    abiertos = Pedido.objects.filter(sucursal=request.sucursal, estado="abierto")
+    mesas_ocupadas = abiertos.values_list("mesa_id", flat=True).distinct().count()
     mesas_libres = max(total_mesas - mesas_ocupadas, 0)
-    pedidos_activos = Pedido.objects.filter(estado="abierto").count()
+    pedidos_activos = abiertos.count()
 
     return render(request, "ventas/inicio.html", {
         "total_mesas": total_mesas,
@@ -31,7 +39,7 @@ def inicio(request):
 # ================= MESAS ==================
 def lista_mesas(request):
     """Lista todas las mesas y su estado (ocupada/libre)."""
-    mesas = Mesa.objects.all().order_by("numero")
+    mesas = Mesa.objects.filter(sucursal=request.sucursal).order_by("numero")
     mesas_info = []
     for mesa in mesas:
         pedido_activo = Pedido.objects.filter(mesa=mesa, estado="abierto").first()
@@ -45,14 +53,14 @@ def lista_mesas(request):
 
 def abrir_mesa(request, mesa_id):
     """Abre un pedido en la mesa seleccionada (marca mesa como ocupada)."""
-    mesa = get_object_or_404(Mesa, id=mesa_id)
+    mesa = get_object_or_404(Mesa, id=mesa_id, sucursal=request.sucursal)
     # Si ya hay un pedido abierto, redirigimos
     pedido_existente = Pedido.objects.filter(mesa=mesa, estado="abierto").first()
     if pedido_existente:
         return redirect("detalle_pedido", pedido_id=pedido_existente.id)
 
     # Crear pedido y marcar mesa ocupada
-    pedido = Pedido.objects.create(mesa=mesa)
+    pedido = Pedido.objects.create(sucursal=request.sucursal, mesa=mesa)
     mesa.esta_ocupada = True
     mesa.save()
     return redirect("detalle_pedido", pedido_id=pedido.id)
@@ -60,11 +68,12 @@ def abrir_mesa(request, mesa_id):
 
 def liberar_mesa(request, pk):
     """Libera una mesa sin borrar pedidos (por ejemplo, si cliente se retira)."""
-    mesa = get_object_or_404(Mesa, pk=pk)
+    mesa = get_object_or_404(Mesa, pk=pk, sucursal=request.sucursal)
     mesa.esta_ocupada = False
     mesa.save()
     # opcional: marcar pedidos abiertos asociados como cancelados o cerrados? Aquí los dejamos cerrados:
-    Pedido.objects.filter(mesa=mesa, estado="abierto").update(estado="cancelado")
+    Pedido.objects.filter(mesa=mesa, estado="abierto")\
+        .update(estado="cancelado", actualizado=timezone.now())
     messages.info(request, f"✅ Mesa {mesa.numero} liberada.")
     return redirect("lista_mesas")
 
@@ -77,7 +86,7 @@ def carta(request, pedido_id=None):
     Si se pasa un pedido_id, se permite agregar platos a ese pedido.
     """
     categoria_filtro = request.GET.get("categoria")
-    platos_qs = Plato.objects.filter(activo=True)
+    platos_qs = Plato.objects.filter(activo=True).exclude(no_disponible_en=request.sucursal)
     if categoria_filtro:
         platos_qs = platos_qs.filter(categoria=categoria_filtro)
 
@@ -87,7 +96,7 @@ def carta(request, pedido_id=None):
         platos_por_categoria[plato.categoria].append(plato)
 
     # Si hay pedido_id, obtener el pedido
-    pedido = get_object_or_404(Pedido, id=pedido_id) if pedido_id else None
+    pedido = get_object_or_404(Pedido, id=pedido_id, sucursal=request.sucursal) if pedido_id else None
 
     context = {
         "platos_por_categoria": dict(platos_por_categoria),  # convertir a dict normal
@@ -98,26 +107,31 @@ def carta(request, pedido_id=None):
 def importar_carta(request):
     """Importa la carta desde un archivo Excel (por categorías)."""
     if request.method == "POST" and request.FILES.get("archivo"):
+        # pandas se importa aquí y no al cargar el módulo: pesa decenas de MB
+        # por worker y esta pantalla se usa muy poco.
+        import pandas as pd
+
         archivo = request.FILES["archivo"]
         fs = FileSystemStorage()
         filename = fs.save(archivo.name, archivo)
         filepath = fs.path(filename)
         try:
             xls = pd.ExcelFile(filepath)
-            for hoja in xls.sheet_names:
-                df = pd.read_excel(filepath, sheet_name=hoja)
-                df.columns = df.columns.str.strip().str.lower()
-                for _, row in df.iterrows():
-                    nombre = str(row.get("producto", "")).strip()
-                    try:
-                        precio = float(row.get("precio", 0))
-                    except Exception:
-                        precio = 0
-                    if nombre and precio > 0:
-                        Plato.objects.update_or_create(
-                            nombre=nombre,
-                            defaults={"precio": precio, "categoria": hoja},
-                        )
+            with autoservicio.republicacion_agrupada():
+                for hoja in xls.sheet_names:
+                    df = pd.read_excel(filepath, sheet_name=hoja)
+                    df.columns = df.columns.str.strip().str.lower()
+                    for _, row in df.iterrows():
+                        nombre = str(row.get("producto", "")).strip()
+                        try:
+                            precio = float(row.get("precio", 0))
+                        except Exception:
+                            precio = 0
+                        if nombre and precio > 0:
+                            Plato.objects.update_or_create(
+                                nombre=nombre,
+                                defaults={"precio": precio, "categoria": hoja},
+                            )
             messages.success(request, "✅ Carta actualizada correctamente desde Excel")
         except Exception as e:
             messages.error(request, f"❌ Error al importar carta: {str(e)}")
@@ -128,10 +142,11 @@ def importar_carta(request):
 # ================= PEDIDOS ==================
 def detalle_pedido(request, pedido_id):
     """Detalle del pedido: lista platos agregados y calcula total."""
-    pedido = get_object_or_404(Pedido, id=pedido_id)
+    pedido = get_object_or_404(Pedido, id=pedido_id, sucursal=request.sucursal)
     detalles = pedido.detalles.all()
     total = detalles.aggregate(total=Sum(F("cantidad") * F("plato__precio")))["total"] or Decimal("0.00")
-    platos = Plato.objects.filter(activo=True).order_by("categoria", "nombre")
+    platos = Plato.objects.filter(activo=True).exclude(no_disponible_en=request.sucursal)\
+        .order_by("categoria", "nombre")
     return render(request, "ventas/detalle_pedido.html", {
         "pedido": pedido,
         "detalles": detalles,
@@ -141,14 +156,15 @@ def detalle_pedido(request, pedido_id):
 
 
 def agregar_plato(request, pedido_id, plato_id):
-    pedido = get_object_or_404(Pedido, id=pedido_id)
+    pedido = get_object_or_404(Pedido, id=pedido_id, sucursal=request.sucursal)
     if pedido.estado != "abierto":
         messages.error(request, "No se puede modificar un pedido cerrado o cancelado.")
         return redirect("detalle_pedido", pedido_id=pedido.id)
 
-    plato = get_object_or_404(Plato, id=plato_id)
+    plato = get_object_or_404(Plato.objects.exclude(no_disponible_en=request.sucursal), id=plato_id)
+    # Solo se suma a una línea aún pendiente: lo ya enviado a cocina conserva sus tiempos
     detalle, created = DetallePedido.objects.get_or_create(
-        pedido=pedido, plato=plato,
+        pedido=pedido, plato=plato, estado="pendiente",
         defaults={"cantidad": 1}  # 👈 Se crea con cantidad=1 si no existía
     )
 
@@ -161,11 +177,15 @@ def agregar_plato(request, pedido_id, plato_id):
 
 
 def quitar_plato(request, pedido_id, plato_id):
-    pedido = get_object_or_404(Pedido, id=pedido_id)
+    pedido = get_object_or_404(Pedido, id=pedido_id, sucursal=request.sucursal)
     if pedido.estado != "abierto":
         messages.error(request, "No se puede modificar un pedido cerrado o cancelado.")
         return redirect("detalle_pedido", pedido_id=pedido.id)
-    detalle = get_object_or_404(DetallePedido, pedido=pedido, plato_id=plato_id)
+    # Se descuenta primero de la línea pendiente más reciente
+    detalle = pedido.detalles.filter(plato_id=plato_id)\
+        .order_by(Case(When(estado="pendiente", then=0), default=1), "-creado").first()
+    if detalle is None:
+        raise Http404("El plato no está en el pedido.")
     detalle.cantidad -= 1
     if detalle.cantidad <= 0:
         detalle.delete()
@@ -174,7 +194,7 @@ def quitar_plato(request, pedido_id, plato_id):
     return redirect("detalle_pedido", pedido_id=pedido.id)
 
 def cerrar_pedido(request, pedido_id):
-    pedido = get_object_or_404(Pedido, id=pedido_id)
+    pedido = get_object_or_404(Pedido, id=pedido_id, sucursal=request.sucursal)
     if pedido.estado != "abierto":
         return redirect("detalle_pedido", pedido_id=pedido.id)
     pedido.cerrar_pedido()
@@ -182,25 +202,28 @@ def cerrar_pedido(request, pedido_id):
 
 
 # ================= DASHBOARD ==================
+@lectura_reportes
 def dashboard(request):
     """Dashboard principal con caja, pedidos y gráficos."""
     hoy = timezone.localdate()
+    cajas = Caja.objects.filter(sucursal=request.sucursal)
 
-    caja = Caja.objects.filter(fecha=hoy, abierta=True).first()
-    ultima_caja = Caja.objects.filter(fecha__lt=hoy).order_by("-fecha").first()
+    caja = cajas.filter(fecha=hoy, abierta=True).first()
+    ultima_caja = cajas.filter(fecha__lt=hoy).order_by("-fecha").first()
 
-    pedidos = Pedido.objects.filter(creado__date=hoy)
+    pedidos = Pedido.objects.filter(sucursal=request.sucursal, creado__date=hoy)
     total_pedidos = pedidos.count()
     total_ingresos = DetallePedido.objects.filter(pedido__in=pedidos)\
         .aggregate(total=Sum(F("cantidad") * F("plato__precio")))["total"] or Decimal("0.00")
 
-    platos_mas_vendidos = DetallePedido.objects.filter(pedido__creado__date=hoy)\
+    detalles_sucursal = DetallePedido.objects.filter(pedido__sucursal=request.sucursal)
+    platos_mas_vendidos = detalles_sucursal.filter(pedido__creado__date=hoy)\
         .values("plato__nombre")\
         .annotate(total=Sum("cantidad"))\
         .order_by("-total")[:5]
 
     siete_dias = hoy - timedelta(days=6)
-    ventas_por_dia_qs = DetallePedido.objects.filter(pedido__creado__date__gte=siete_dias)\
+    ventas_por_dia_qs = detalles_sucursal.filter(pedido__creado__date__gte=siete_dias)\
         .values("pedido__creado__date")\
         .annotate(total=Sum(F("cantidad") * F("plato__precio")))\
         .order_by("pedido__creado__date")
@@ -229,7 +252,7 @@ def abrir_caja(request):
     """Abre la caja del día con monto inicial."""
     hoy = timezone.localdate()
 
-    if Caja.objects.filter(fecha=hoy).exists():
+    if Caja.objects.filter(sucursal=request.sucursal, fecha=hoy).exists():
         messages.info(request, "ℹ️ Ya existe una caja para hoy, no puedes abrir otra.")
         return redirect("dashboard")
 
@@ -240,6 +263,7 @@ def abrir_caja(request):
             monto_inicial = 0
 
         Caja.objects.create(
+            sucursal=request.sucursal,
             fecha=hoy,
             fecha_apertura=timezone.now(),
             monto_inicial=monto_inicial,
@@ -254,10 +278,10 @@ def abrir_caja(request):
 
 def cerrar_caja(request, pk):
     """Cierra la caja y calcula el monto final."""
-    caja = get_object_or_404(Caja, pk=pk)
+    caja = get_object_or_404(Caja, pk=pk, sucursal=request.sucursal)
     if caja.abierta:
         hoy = caja.fecha
-        pedidos = Pedido.objects.filter(creado__date=hoy)
+        pedidos = Pedido.objects.filter(sucursal=caja.sucursal_id, creado__date=hoy)
         total_vendido = DetallePedido.objects.filter(pedido__in=pedidos)\
             .aggregate(total=Sum(F("cantidad") * F("plato__precio")))["total"] or Decimal("0.00")
 
@@ -272,16 +296,18 @@ def cerrar_caja(request, pk):
     return redirect("dashboard")
 
 
+@lectura_reportes
 def lista_cajas(request):
-    """Lista de todas las cajas (historial)."""
-    cajas = Caja.objects.all().order_by("-fecha")
+    """Historial de cajas, paginado por (fecha, id)."""
+    cajas = paginar(Caja.objects.filter(sucursal=request.sucursal), "-fecha", request.GET)
     return render(request, "ventas/lista_cajas.html", {"cajas": cajas})
 
 
+@lectura_reportes
 def detalle_caja(request, caja_id):
     """Muestra el detalle de una caja en particular."""
-    caja = get_object_or_404(Caja, id=caja_id)
-    pedidos = Pedido.objects.filter(creado__date=caja.fecha)
+    caja = get_object_or_404(Caja, id=caja_id, sucursal=request.sucursal)
+    pedidos = Pedido.objects.filter(sucursal=caja.sucursal_id, creado__date=caja.fecha)
 
     top_platos = (
         DetallePedido.objects.filter(pedido__in=pedidos)
@@ -299,12 +325,105 @@ def detalle_caja(request, caja_id):
 # ================= TICKET ==================
 def imprimir_ticket(request, pedido_id, tipo="cliente"):
     """Genera ticket de un pedido para impresión."""
-    pedido = get_object_or_404(Pedido, id=pedido_id)
+    pedido = get_object_or_404(Pedido, id=pedido_id, sucursal=request.sucursal)
     return render(request, "ventas/ticket.html", {"pedido": pedido, "tipo": tipo})
 
 
 # ================= PEDIDOS ACTIVOS ==================
 def pedidos_activos(request):
-    """Lista de pedidos activos (no cerrados)."""
-    pedidos = Pedido.objects.filter(estado="abierto")
+    """Lista de pedidos activos (no cerrados), paginada por (creado, id)."""
+    pedidos = paginar(
+        Pedido.objects.filter(sucursal=request.sucursal, estado="abierto").select_related("mesa"),
+        "-creado", request.GET,
+    )
     return render(request, "ventas/pedidos_activos.html", {"pedidos": pedidos})
+
+
+# ================= COCINA ==================
+def cola_cocina(request):
+    """Cola de cocina por estación, ordenada por tiempo de espera."""
+    return render(request, "ventas/cocina.html", {
+        "cola": cocina.cola_por_estacion(request.sucursal),
+    })
+
+
+def iniciar_detalle(request, detalle_id):
+    detalle = get_object_or_404(DetallePedido, id=detalle_id, pedido__sucursal=request.sucursal)
+    if detalle.estado == "pendiente":
+        detalle.iniciar()
+    return redirect("cola_cocina")
+
+
+def servir_detalle(request, detalle_id):
+    detalle = get_object_or_404(DetallePedido, id=detalle_id, pedido__sucursal=request.sucursal)
+    if detalle.estado != "servido":
+        detalle.servir()
+    return redirect("cola_cocina")
+
+
+@lectura_reportes
+def reporte_cocina(request):
+    """Tiempos de preparación (p50/p95) por estación para un día."""
+    try:
+        dia = datetime.strptime(request.GET["fecha"], "%Y-%m-%d").date()
+    except (KeyError, ValueError):
+        dia = timezone.localdate()
+    desde = timezone.make_aware(datetime.combine(dia, time.min))
+    hasta = desde + timedelta(days=1)
+
+    return render(request, "ventas/reporte_cocina.html", {
+        "fecha": dia,
+        "latencias": cocina.latencias_por_estacion(request.sucursal, desde, hasta),
+    })
+
+
+# ================= COMPRAS (PRONÓSTICO) ==================
+@lectura_reportes
+def lista_compras(request):
+    """Pronóstico de mañana por plato y lista de compras de ingredientes."""
+    if request.GET.get("recalcular"):
+        pronostico.invalidar(request.sucursal)
+    return render(request, "ventas/compras.html", pronostico.pronosticar(request.sucursal))
+
+
+# ================= AUTOSERVICIO (QR) ==================
+def qr_mesa(request, mesa_id):
+    """Imagen PNG del QR de la mesa (se genera una vez y queda en disco)."""
+    mesa = get_object_or_404(Mesa, id=mesa_id, sucursal=request.sucursal)
+    ruta = autoservicio.generar_qr(mesa)
+    return FileResponse(open(ruta, "rb"), content_type="image/png")
+
+
+@csrf_exempt  # la carta es un archivo estático; la mesa viaja en un token firmado
+@require_POST
+def autoservicio_pedido(request):
+    """Recibe el pedido de la carta QR y lo suma al pedido abierto de la mesa."""
+    try:
+        datos = json.loads(request.body)
+        if not isinstance(datos, dict) or not isinstance(datos.get("items"), list):
+            raise ValueError
+        sucursal_id, mesa_id = autoservicio.mesa_desde_token(datos["mesa"])
+        items = defaultdict(int)
+        for item in datos["items"]:
+            plato_id, cantidad = int(item["plato"]), int(item["cantidad"])
+            if not 0 < plato_id < 2 ** 63 or not 1 <= cantidad <= autoservicio.MAX_CANTIDAD:
+                raise ValueError
+            items[plato_id] += cantidad
+        if any(c > autoservicio.MAX_CANTIDAD for c in items.values()):
+            raise ValueError
+    except (ValueError, KeyError, TypeError, OverflowError, signing.BadSignature):
+        return JsonResponse({"ok": False, "error": "Pedido inválido."}, status=400)
+
+    # La sucursal viene en el token del QR, no en la sesión del cliente
+    sucursal = Sucursal.objects.using("default").filter(pk=sucursal_id, activa=True).first()
+    if sucursal is None:
+        return JsonResponse({"ok": False, "error": "Mesa no encontrada."}, status=404)
+    try:
+        with usar_sucursal(sucursal):
+            pedido = autoservicio.registrar_pedido(sucursal, mesa_id, items, datos.get("version"))
+    except Mesa.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "Mesa no encontrada."}, status=404)
+    except autoservicio.PedidoInvalido as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
+
+    return JsonResponse({"ok": True, "pedido": pedido.id})